@@ -0,0 +1,280 @@
+"""Асинхронные представления для чтения, подключаются в config.urls_asgi.
+
+Обслуживают GET-запросы с JSON-ответом через асинхронный ORM. Всё, что
+они не умеют (запись, курсорная пагинация, ошибки валидации, другие
+форматы и способы аутентификации), передаётся представлениям DRF.
+"""
+from functools import wraps
+from math import ceil
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth.models import AnonymousUser
+from django.http import HttpResponse
+from django.utils.cache import get_conditional_response
+from django.views.decorators.csrf import csrf_exempt
+from rest_framework.authentication import SessionAuthentication
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework.renderers import JSONRenderer
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+from recipes.models import Ingredient, Recipe
+from recipes.search import search_recipes
+
+from .constants import INGREDIENT_SEARCH_LIMIT, RECIPE_LIST_CACHE_PARAMS
+from .mixins import add_conditional_headers, make_etag, make_list_cache_key
+from .paginators import CustomPagePagination, RecipeCursorPagination
+from .serializers import IngredientSerializer, RecipeReadSerializer
+from .services import versions
+from .services.ingredient_index import ingredient_index
+from .services.response_cache import recipe_list_cache
+from .services.viewer_state import aget_viewer_state
+from .views import IngredientViewSet, RecipeViewSet
+
+JSON_MEDIA_TYPES = ('application/json', 'application/*', '*/*')
+
+
+class Delegate(Exception):
+    pass
+
+
+def accepts_json(request):
+    accept = request.headers.get('Accept', '')
+    return (
+        api_settings.URL_FORMAT_OVERRIDE not in request.GET
+        and 'text/html' not in accept
+        and (not accept or any(type in accept for type in JSON_MEDIA_TYPES))
+    )
+
+
+def allowed_methods(sync_view):
+    methods = {*sync_view.actions, 'head', 'options'}
+    return ', '.join(
+        method.upper() for method in sync_view.cls.http_method_names
+        if method in methods
+    )
+
+
+def with_sync_fallback(sync_view):
+    def decorator(handler):
+        allow = allowed_methods(sync_view)
+
+        @csrf_exempt
+        @wraps(handler)
+        async def view(request, **kwargs):
+            if request.method == 'GET' and accepts_json(request):
+                try:
+                    response = await handler(request, **kwargs)
+                except Delegate:
+                    pass
+                else:
+                    response['Allow'] = allow
+                    return response
+            return await sync_to_async(sync_view)(request, **kwargs)
+        return view
+    return decorator
+
+
+def json_response(data):
+    return HttpResponse(
+        JSONRenderer().render(data), content_type=JSON_MEDIA_TYPES[0]
+    )
+
+
+async def authenticate(request):
+    for authentication_class in api_settings.DEFAULT_AUTHENTICATION_CLASSES:
+        if (
+            issubclass(authentication_class, SessionAuthentication)
+            and settings.SESSION_COOKIE_NAME not in request.COOKIES
+        ):
+            continue
+        authenticator = authentication_class()
+        if not hasattr(authenticator, 'aauthenticate'):
+            raise Delegate
+        try:
+            user = await authenticator.aauthenticate(request)
+        except AuthenticationFailed:
+            raise Delegate
+        if user is not None:
+            return user
+    return AnonymousUser()
+
+
+async def conditional_get(request, version_key, handler):
+    tag, modified = await versions.aget(version_key, request)
+    etag = make_etag(tag, JSON_MEDIA_TYPES[0], request.get_full_path())
+    last_modified = int(modified)
+    response = get_conditional_response(
+        request, etag=etag, last_modified=last_modified
+    )
+    if response is None:
+        response = await handler()
+    return add_conditional_headers(response, etag, last_modified)
+
+
+async def serialize_recipes(request, user, recipes):
+    state = await aget_viewer_state(request, user)
+    subscribed_author_ids = {
+        author_id async for author_id in
+        user.subscribers.values_list('author_id', flat=True)
+    } if user.is_authenticated else set()
+    serializer = RecipeReadSerializer(context={
+        'request': request,
+        'subscribed_author_ids': subscribed_author_ids,
+        'favorited_recipe_ids': state.favorites,
+        'carted_recipe_ids': state.cart,
+    })
+    await serializer.aload_ingredients(recipes)
+    return [serializer.to_representation(recipe) for recipe in recipes]
+
+
+async def filter_recipes(request, user):
+    queryset = Recipe.objects.values(*RecipeReadSerializer.source_fields)
+    params = request.GET
+    author = params.get('author')
+    if author:
+        if not author.isdigit():
+            raise Delegate
+        queryset = queryset.filter(author_id=author)
+    if user.is_authenticated:
+        state = await aget_viewer_state(request, user)
+        if params.get('is_in_shopping_cart'):
+            queryset = queryset.filter(id__in=state.cart)
+        if params.get('is_favorited') == '1':
+            queryset = queryset.filter(id__in=state.favorites)
+    return search_recipes(queryset, params.get(api_settings.SEARCH_PARAM, ''))
+
+
+def get_page_size(request):
+    pagination = CustomPagePagination
+    try:
+        size = int(request.GET[pagination.page_size_query_param])
+    except (KeyError, ValueError):
+        return pagination.page_size
+    if size <= 0:
+        return pagination.page_size
+    return min(size, pagination.max_page_size)
+
+
+async def recipe_page(request, user):
+    if RecipeCursorPagination.cursor_query_param in request.GET:
+        raise Delegate
+    page_param = CustomPagePagination.page_query_param
+    number = request.GET.get(page_param) or '1'
+    if not number.isdigit() or int(number) < 1:
+        raise Delegate
+    number, size = int(number), get_page_size(request)
+    queryset = await filter_recipes(request, user)
+    count = await queryset.acount()
+    pages = max(1, ceil(count / size))
+    if number > pages or (not count and 'author' in request.GET):
+        raise Delegate
+    offset = (number - 1) * size
+    recipes = [recipe async for recipe in queryset[offset:offset + size]]
+    url = request.build_absolute_uri()
+    previous = None
+    if number > 1:
+        previous = (
+            remove_query_param(url, page_param) if number == 2
+            else replace_query_param(url, page_param, number - 1)
+        )
+    return {
+        'count': count,
+        'next': (
+            replace_query_param(url, page_param, number + 1)
+            if number < pages else None
+        ),
+        'previous': previous,
+        'results': await serialize_recipes(request, user, recipes),
+    }
+
+
+async def cached_recipe_page(request, user):
+    tag, _ = await versions.aget(versions.RECIPES, request)
+    key = make_list_cache_key(
+        recipe_list_cache, tag, request.get_host(), request.GET,
+        RECIPE_LIST_CACHE_PARAMS
+    )
+    content = await recipe_list_cache.aget(key)
+    cache_status = 'HIT'
+    if content is None:
+        cache_status = 'MISS'
+        content = JSONRenderer().render(await recipe_page(request, user))
+        await recipe_list_cache.aset(key, content)
+    response = HttpResponse(content, content_type=JSON_MEDIA_TYPES[0])
+    response['X-Cache'] = cache_status
+    return response
+
+
+@with_sync_fallback(RecipeViewSet.as_view({'get': 'list', 'post': 'create'}))
+async def recipe_list(request):
+    user = await authenticate(request)
+    if user.is_authenticated:
+        return json_response(await recipe_page(request, user))
+    return await conditional_get(
+        request, versions.RECIPES, lambda: cached_recipe_page(request, user)
+    )
+
+
+@with_sync_fallback(RecipeViewSet.as_view({
+    'get': 'retrieve',
+    'put': 'update',
+    'patch': 'partial_update',
+    'delete': 'destroy',
+}))
+async def recipe_detail(request, pk):
+    if request.GET:
+        raise Delegate
+    user = await authenticate(request)
+
+    async def render_recipe():
+        recipe = await Recipe.objects.values(
+            *RecipeReadSerializer.source_fields
+        ).filter(pk=pk).afirst()
+        if recipe is None:
+            raise Delegate
+        return json_response(
+            (await serialize_recipes(request, user, [recipe]))[0]
+        )
+
+    if user.is_authenticated:
+        return await render_recipe()
+    return await conditional_get(request, versions.RECIPES, render_recipe)
+
+
+@with_sync_fallback(IngredientViewSet.as_view({'get': 'list'}))
+async def ingredient_list(request):
+    await authenticate(request)
+
+    async def render_ingredients():
+        version, _ = await versions.aget(versions.INGREDIENTS, request)
+        await ingredient_index.arefresh(version)
+        name = request.GET.get('name')
+        return json_response(
+            ingredient_index.search(name, INGREDIENT_SEARCH_LIMIT, version)
+            if name else ingredient_index.all(version)
+        )
+
+    return await conditional_get(
+        request, versions.INGREDIENTS, render_ingredients
+    )
+
+
+@with_sync_fallback(IngredientViewSet.as_view({'get': 'retrieve'}))
+async def ingredient_detail(request, pk):
+    if request.GET:
+        raise Delegate
+    await authenticate(request)
+
+    async def render_ingredient():
+        ingredient = await Ingredient.objects.values(
+            *IngredientSerializer.Meta.fields
+        ).filter(pk=pk).afirst()
+        if ingredient is None:
+            raise Delegate
+        return json_response(ingredient)
+
+    return await conditional_get(
+        request, versions.INGREDIENTS, render_ingredient
+    )
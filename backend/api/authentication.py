@@ -0,0 +1,63 @@
+import hashlib
+
+from django.conf import settings
+from django.core.cache import caches
+from rest_framework.authentication import (
+    TokenAuthentication,
+    get_authorization_header
+)
+from rest_framework.exceptions import AuthenticationFailed
+
+
+def get_token_cache():
+    return caches[settings.TOKEN_CACHE['ALIAS']]
+
+
+def make_token_cache_key(key):
+    return f'auth-token:{hashlib.sha256(key.encode()).hexdigest()}'
+
+
+def forget_tokens(keys):
+    keys = [make_token_cache_key(key) for key in keys]
+    if keys:
+        get_token_cache().delete_many(keys)
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    """Хранит пользователя по токену в кэше, чтобы не ходить в БД."""
+
+    def authenticate_credentials(self, key):
+        cache = get_token_cache()
+        cache_key = make_token_cache_key(key)
+        user = cache.get(cache_key)
+        if user is not None:
+            return user, self.get_model()(key=key, user=user)
+        user, token = super().authenticate_credentials(key)
+        cache.set(cache_key, user, settings.TOKEN_CACHE['TIMEOUT'])
+        return user, token
+
+    async def aauthenticate(self, request):
+        """Вариант authenticate для асинхронных представлений под ASGI."""
+        auth = get_authorization_header(request).split()
+        if not auth or auth[0].lower() != self.keyword.lower().encode():
+            return None
+        if len(auth) != 2:
+            raise AuthenticationFailed
+        try:
+            key = auth[1].decode()
+        except UnicodeError:
+            raise AuthenticationFailed
+        cache = get_token_cache()
+        cache_key = make_token_cache_key(key)
+        user = await cache.aget(cache_key)
+        if user is None:
+            token = await self.get_model().objects.select_related(
+                'user'
+            ).filter(key=key).afirst()
+            if token is None or not token.user.is_active:
+                raise AuthenticationFailed
+            user = token.user
+            await cache.aset(
+                cache_key, user, settings.TOKEN_CACHE['TIMEOUT']
+            )
+        return user
@@ -1 +1,16 @@
-PAGE_SIZE = 6
\ No newline at end of file
+PAGE_SIZE = 6
+SHOPPING_LIST_PDF_CACHE_TIMEOUT = 60 * 60
+SHOPPING_LIST_PDF_SPOOL_MAX_SIZE = 1024 * 1024
+INGREDIENT_SEARCH_LIMIT = 50
+HTTP_CACHE_MAX_AGE = 60
+RECIPE_LIST_CACHE_PARAMS = ('page', 'limit', 'author', 'search', 'cursor')
+MAX_IMAGE_UPLOAD_SIZE = 10 * 1024 * 1024
+IMAGE_SPOOL_MAX_SIZE = 1024 * 1024
+IMAGE_DECODE_CHUNK_SIZE = 64 * 1024
+BASE64_MARKER = ';base64,'
+ALLOWED_IMAGE_FORMATS = {
+    'JPEG': 'jpg',
+    'PNG': 'png',
+    'GIF': 'gif',
+    'WEBP': 'webp',
+}
@@ -1,7 +1,12 @@
 from django.contrib.auth import get_user_model
 import django_filters
+from rest_framework.filters import BaseFilterBackend
+from rest_framework.settings import api_settings
 
 from recipes.models import Ingredient, Recipe
+from recipes.search import search_recipes
+
+from .services.viewer_state import get_viewer_state
 
 User = get_user_model()
 
@@ -28,10 +33,20 @@ class RecipeSearchFilter(django_filters.FilterSet):
 
     def filter_cart(self, queryset, name, value):
         if value and self.request.user.is_authenticated:
-            return queryset.filter(shoppingcart_by_users__user=self.request.user)
+            return queryset.filter(id__in=get_viewer_state(self.request).cart)
         return queryset
 
     def filter_favorite(self, queryset, name, value):
         if value == '1' and self.request.user.is_authenticated:
-            return queryset.filter(favoriterecipe_by_users__user=self.request.user)
+            return queryset.filter(
+                id__in=get_viewer_state(self.request).favorites
+            )
         return queryset
+
+
+class RecipeFullTextSearchFilter(BaseFilterBackend):
+    search_param = api_settings.SEARCH_PARAM
+
+    def filter_queryset(self, request, queryset, view):
+        query = request.query_params.get(self.search_param, '')
+        return search_recipes(queryset, query)
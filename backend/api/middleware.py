@@ -0,0 +1,81 @@
+import logging
+import time
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connection
+
+logger = logging.getLogger(__name__)
+
+
+class QueryBudgetExceeded(Exception):
+    pass
+
+
+class QueryStats:
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.slowest_time = 0.0
+        self.slowest_sql = ''
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            elapsed = time.perf_counter() - started
+            self.count += 1
+            self.total += elapsed
+            if elapsed > self.slowest_time:
+                self.slowest_time = elapsed
+                self.slowest_sql = sql
+
+
+class QueryInstrumentationMiddleware:
+    def __init__(self, get_response):
+        config = settings.QUERY_INSTRUMENTATION
+        if not config['ENABLED']:
+            raise MiddlewareNotUsed
+        self.strict = config['STRICT']
+        self.get_response = get_response
+
+    def __call__(self, request):
+        stats = QueryStats()
+        with connection.execute_wrapper(stats):
+            response = self.get_response(request)
+        response['X-Query-Count'] = stats.count
+        response['Server-Timing'] = (
+            f'db;dur={stats.total * 1000:.1f};desc="{stats.count} queries"'
+        )
+        logger.info(
+            'method=%s path=%s status=%s queries=%d sql_ms=%.1f '
+            'slowest_ms=%.1f slowest_sql="%s"',
+            request.method,
+            request.path,
+            response.status_code,
+            stats.count,
+            stats.total * 1000,
+            stats.slowest_time * 1000,
+            stats.slowest_sql[:200]
+        )
+        budget = getattr(request, 'query_budget', None)
+        if budget is not None and stats.count > budget:
+            message = (
+                f'{request.method} {request.path}: {stats.count} queries, '
+                f'budget is {budget}'
+            )
+            if self.strict:
+                raise QueryBudgetExceeded(message)
+            logger.warning(message)
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        view_class = getattr(view_func, 'cls', None)
+        actions = getattr(view_func, 'actions', None)
+        if view_class is None or not actions:
+            return
+        action = actions.get(request.method.lower())
+        request.query_budget = getattr(
+            view_class, 'query_budgets', {}
+        ).get(action)
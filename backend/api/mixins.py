@@ -0,0 +1,95 @@
+import hashlib
+
+from django.http import HttpResponse
+from django.utils.cache import (
+    get_conditional_response,
+    patch_cache_control,
+    patch_vary_headers
+)
+from django.utils.http import http_date, quote_etag
+from rest_framework.renderers import JSONRenderer
+
+from .constants import HTTP_CACHE_MAX_AGE
+from .services import versions
+
+
+def make_etag(tag, media_type, full_path):
+    return quote_etag(hashlib.sha256(
+        f'{tag}:{media_type}:{full_path}'.encode()
+    ).hexdigest())
+
+
+def add_conditional_headers(response, etag, last_modified):
+    if response.status_code in (200, 304):
+        response['ETag'] = etag
+        response['Last-Modified'] = http_date(last_modified)
+        patch_cache_control(response, public=True, max_age=HTTP_CACHE_MAX_AGE)
+        patch_vary_headers(response, ('Accept', 'Authorization'))
+    return response
+
+
+def make_list_cache_key(response_cache, tag, host, query_params, names):
+    return response_cache.make_key(tag, host, sorted(
+        (name, query_params[name].strip())
+        for name in names if name in query_params
+    ))
+
+
+class ConditionalGetMixin:
+    cache_version_key = None
+
+    def allows_conditional_get(self, request):
+        return True
+
+    def list(self, request, *args, **kwargs):
+        return self.conditional_get(super().list, request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.conditional_get(
+            super().retrieve, request, *args, **kwargs
+        )
+
+    def conditional_get(self, handler, request, *args, **kwargs):
+        if not self.allows_conditional_get(request):
+            return handler(request, *args, **kwargs)
+        tag, modified = versions.get(self.cache_version_key, request)
+        etag = make_etag(
+            tag, request.accepted_media_type, request.get_full_path()
+        )
+        last_modified = int(modified)
+        response = get_conditional_response(
+            request, etag=etag, last_modified=last_modified
+        )
+        if response is None:
+            response = handler(request, *args, **kwargs)
+        return add_conditional_headers(response, etag, last_modified)
+
+
+class AnonymousListCacheMixin:
+    cache_version_key = None
+    cache_query_params = ()
+    response_cache = None
+
+    def list(self, request, *args, **kwargs):
+        if (
+            request.user.is_authenticated
+            or not isinstance(request.accepted_renderer, JSONRenderer)
+        ):
+            return super().list(request, *args, **kwargs)
+        tag, _ = versions.get(self.cache_version_key, request)
+        key = make_list_cache_key(
+            self.response_cache, tag, request.get_host(),
+            request.query_params, self.cache_query_params
+        )
+        content = self.response_cache.get(key)
+        cache_status = 'HIT'
+        if content is None:
+            cache_status = 'MISS'
+            response = super().list(request, *args, **kwargs)
+            if response.status_code != 200:
+                return response
+            content = JSONRenderer().render(response.data)
+            self.response_cache.set(key, content)
+        response = HttpResponse(content, content_type='application/json')
+        response['X-Cache'] = cache_status
+        return response
@@ -1,4 +1,9 @@
-from rest_framework.pagination import PageNumberPagination
+from rest_framework.pagination import (
+    BasePagination,
+    CursorPagination,
+    PageNumberPagination
+)
+from rest_framework.settings import api_settings
 
 from api.constants import PAGE_SIZE
 
@@ -7,3 +12,62 @@ class CustomPagePagination(PageNumberPagination):
     page_size = PAGE_SIZE
     page_size_query_param = 'limit'
     max_page_size = 100
+
+
+class RecipeCursorPagination(CursorPagination):
+    page_size = PAGE_SIZE
+    page_size_query_param = 'limit'
+    max_page_size = 100
+    ordering = ('-pub_date', '-id')
+
+
+class SubscriptionCursorPagination(CursorPagination):
+    page_size = PAGE_SIZE
+    page_size_query_param = 'limit'
+    max_page_size = 100
+    ordering = 'username'
+
+
+class CursorOptInPagination(BasePagination):
+    page_pagination_class = None
+    cursor_pagination_class = None
+
+    def __init__(self):
+        self.page_paginator = self.page_pagination_class()
+        self.cursor_paginator = self.cursor_pagination_class()
+        self.active_paginator = self.page_paginator
+
+    def __getattr__(self, name):
+        return getattr(self.active_paginator, name)
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.active_paginator = (
+            self.cursor_paginator
+            if self.cursor_paginator.cursor_query_param in request.query_params
+            else self.page_paginator
+        )
+        return self.active_paginator.paginate_queryset(
+            queryset, request, view
+        )
+
+    def get_paginated_response(self, data):
+        return self.active_paginator.get_paginated_response(data)
+
+    def get_paginated_response_schema(self, schema):
+        return self.page_paginator.get_paginated_response_schema(schema)
+
+    def get_schema_operation_parameters(self, view):
+        return (
+            self.page_paginator.get_schema_operation_parameters(view)
+            + self.cursor_paginator.get_schema_operation_parameters(view)
+        )
+
+
+class RecipePagination(CursorOptInPagination):
+    page_pagination_class = CustomPagePagination
+    cursor_pagination_class = RecipeCursorPagination
+
+
+class SubscriptionPagination(CursorOptInPagination):
+    page_pagination_class = api_settings.DEFAULT_PAGINATION_CLASS
+    cursor_pagination_class = SubscriptionCursorPagination
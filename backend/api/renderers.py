@@ -0,0 +1,36 @@
+from rest_framework import renderers
+
+
+class ShoppingListRenderer(renderers.BaseRenderer):
+    charset = 'utf-8'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        """Рендерит только ответы с ошибками, поэтому всегда отдаёт JSON."""
+        json_renderer = renderers.JSONRenderer()
+        response = (renderer_context or {}).get('response')
+        if response is not None:
+            response['Content-Type'] = json_renderer.media_type
+        return json_renderer.render(data)
+
+
+class PDFRenderer(ShoppingListRenderer):
+    media_type = 'application/pdf'
+    format = 'pdf'
+
+
+class PlainTextRenderer(ShoppingListRenderer):
+    media_type = 'text/plain'
+    format = 'txt'
+
+
+class CSVRenderer(ShoppingListRenderer):
+    media_type = 'text/csv'
+    format = 'csv'
+
+
+SHOPPING_LIST_RENDERERS = (
+    PDFRenderer,
+    PlainTextRenderer,
+    CSVRenderer,
+    renderers.JSONRenderer,
+)
@@ -1,34 +1,96 @@
 import base64
+import binascii
+from tempfile import SpooledTemporaryFile
 
 from django.contrib.auth import get_user_model
-from django.core.files.base import ContentFile
+from django.core.files.base import File
+from django.db import transaction
+from django.db.models import F, prefetch_related_objects
+from django.db.models.functions import Greatest
 
+from PIL import Image
 from rest_framework import serializers
 from djoser.serializers import UserSerializer as DjoserUserSerializer
 
 from recipes.models import (
     Recipe,
     Ingredient,
-    RecipeIngredient
+    RecipeIngredient,
+    ShoppingListItem
 )
+from recipes.search import update_search_index
 
 from users.models import UserSubscription
 
+from .constants import (
+    ALLOWED_IMAGE_FORMATS,
+    BASE64_MARKER,
+    IMAGE_DECODE_CHUNK_SIZE,
+    IMAGE_SPOOL_MAX_SIZE,
+    MAX_IMAGE_UPLOAD_SIZE
+)
+from .services.images import (
+    AVATAR_VARIANTS,
+    RECIPE_IMAGE_VARIANTS,
+    media_url,
+    schedule_variants,
+    variant_urls,
+    variant_urls_for_name
+)
+from .services.media import delete_later
+
 User = get_user_model()
 
 
 class CustomBase64ImageField(serializers.ImageField):
+    default_error_messages = {
+        'too_large': 'Размер изображения не должен превышать {max_size} байт.',
+    }
+
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
         self.use_url = False
 
     def to_internal_value(self, data):
         if isinstance(data, str) and data.startswith('data:image'):
-            format, imgstr = data.split(';base64,')
-            ext = format.split('/')[-1]
-            data = ContentFile(base64.b64decode(imgstr), name='temp.' + ext)
+            return self.decode_base64(data)
         return super().to_internal_value(data)
 
+    def decode_base64(self, data):
+        start = data.find(BASE64_MARKER)
+        if start == -1:
+            self.fail('invalid_image')
+        start += len(BASE64_MARKER)
+
+        buffer = SpooledTemporaryFile(max_size=IMAGE_SPOOL_MAX_SIZE)
+        try:
+            pending = ''
+            for offset in range(start, len(data), IMAGE_DECODE_CHUNK_SIZE):
+                pending += ''.join(
+                    data[offset:offset + IMAGE_DECODE_CHUNK_SIZE].split()
+                )
+                ready = len(pending) - len(pending) % 4
+                buffer.write(base64.b64decode(pending[:ready], validate=True))
+                pending = pending[ready:]
+                if buffer.tell() > MAX_IMAGE_UPLOAD_SIZE:
+                    buffer.close()
+                    self.fail('too_large', max_size=MAX_IMAGE_UPLOAD_SIZE)
+            if pending:
+                raise binascii.Error('Incorrect padding')
+            buffer.seek(0)
+            with Image.open(buffer) as image:
+                image_format = image.format
+        except (binascii.Error, OSError, Image.DecompressionBombError):
+            buffer.close()
+            self.fail('invalid_image')
+        if image_format not in ALLOWED_IMAGE_FORMATS:
+            buffer.close()
+            self.fail('invalid_image')
+        buffer.seek(0)
+        return File(
+            buffer, name=f'temp.{ALLOWED_IMAGE_FORMATS[image_format]}'
+        )
+
     def to_representation(self, instance):
         return instance.url if instance else None
 
@@ -53,10 +115,7 @@ class IngredientAmountSerializer(serializers.ModelSerializer):
 
 
 class RecipeIngredientCreateSerializer(serializers.ModelSerializer):
-    id = serializers.PrimaryKeyRelatedField(
-        queryset=Ingredient.objects.all(),
-        source='ingredient'
-    )
+    id = serializers.IntegerField(source='ingredient_id')
     amount = serializers.IntegerField(min_value=1)
 
     class Meta:
@@ -67,15 +126,22 @@ class RecipeIngredientCreateSerializer(serializers.ModelSerializer):
 class ExtendedUserSerializer(DjoserUserSerializer):
     is_subscribed = serializers.SerializerMethodField()
     avatar = CustomBase64ImageField(required=False)
+    avatar_variants = serializers.SerializerMethodField()
 
     class Meta(DjoserUserSerializer.Meta):
         model = User
         fields = (
             'id', 'email', 'username', 'first_name',
-            'last_name', 'avatar', 'is_subscribed'
+            'last_name', 'avatar', 'avatar_variants', 'is_subscribed'
         )
 
+    def get_avatar_variants(self, user):
+        return variant_urls(user.avatar, AVATAR_VARIANTS)
+
     def get_is_subscribed(self, user):
+        subscribed_author_ids = self.context.get('subscribed_author_ids')
+        if subscribed_author_ids is not None:
+            return user.id in subscribed_author_ids
         request = self.context['request']
         return request.user.is_authenticated and request.user.subscribers.filter(author=user).exists()
 
@@ -87,13 +153,28 @@ class UserAvatarSerializer(serializers.ModelSerializer):
         model = User
         fields = ('avatar',)
 
+    def update(self, user, validated_data):
+        old_avatar = user.avatar.name
+        user = super().update(user, validated_data)
+        if user.avatar.name != old_avatar:
+            delete_later(old_avatar, AVATAR_VARIANTS)
+        schedule_variants(user.avatar.name, AVATAR_VARIANTS)
+        return user
+
 
 class RecipeShortSerializer(serializers.ModelSerializer):
+    image_variants = serializers.SerializerMethodField()
+
     class Meta:
         model = Recipe
-        fields = ('id', 'name', 'image', 'cooking_time')
+        fields = ('id', 'name', 'image', 'image_variants', 'cooking_time')
         read_only_fields = fields
 
+    def get_image_variants(self, recipe):
+        return variant_urls(
+            recipe.image, RECIPE_IMAGE_VARIANTS, self.context.get('request')
+        )
+
 
 class RecipeSerializer(serializers.ModelSerializer):
     ingredients = IngredientAmountSerializer(
@@ -103,18 +184,129 @@ class RecipeSerializer(serializers.ModelSerializer):
     )
     author = ExtendedUserSerializer(read_only=True)
     image = CustomBase64ImageField(required=False)
-    is_favorited = serializers.BooleanField(default=False)
-    is_in_shopping_cart = serializers.BooleanField(default=False)
+    image_variants = serializers.SerializerMethodField()
+    is_favorited = serializers.SerializerMethodField()
+    is_in_shopping_cart = serializers.SerializerMethodField()
 
     class Meta:
         model = Recipe
         fields = (
             'id', 'name', 'text', 'author',
-            'image', 'ingredients', 'cooking_time',
+            'image', 'image_variants', 'ingredients', 'cooking_time',
             'is_favorited', 'is_in_shopping_cart'
         )
         read_only_fields = fields
 
+    def get_image_variants(self, recipe):
+        return variant_urls(recipe.image, RECIPE_IMAGE_VARIANTS)
+
+    def get_is_favorited(self, recipe):
+        return recipe.id in self.context.get('favorited_recipe_ids', ())
+
+    def get_is_in_shopping_cart(self, recipe):
+        return recipe.id in self.context.get('carted_recipe_ids', ())
+
+
+class RecipeReadListSerializer(serializers.ListSerializer):
+    def to_representation(self, data):
+        recipes = list(data)
+        self.child.load_ingredients(recipes)
+        return [self.child.to_representation(recipe) for recipe in recipes]
+
+
+class RecipeReadSerializer(serializers.BaseSerializer):
+    """Тот же ответ, что у RecipeSerializer, но из словарей values()."""
+
+    source_fields = (
+        'id', 'name', 'text', 'image', 'cooking_time', 'pub_date',
+        'author_id', 'author__email', 'author__username',
+        'author__first_name', 'author__last_name', 'author__avatar',
+    )
+
+    class Meta:
+        list_serializer_class = RecipeReadListSerializer
+
+    @staticmethod
+    def ingredient_rows(recipe_ids):
+        return RecipeIngredient.objects.filter(
+            recipe_id__in=recipe_ids
+        ).order_by('ingredient__name', 'ingredient_id').values_list(
+            'recipe_id', 'ingredient_id', 'ingredient__name',
+            'ingredient__measurement_unit', 'amount'
+        )
+
+    @staticmethod
+    def attach_ingredients(recipes, rows):
+        ingredients = {recipe['id']: [] for recipe in recipes}
+        for recipe_id, ingredient_id, name, unit, amount in rows:
+            ingredients[recipe_id].append({
+                'id': ingredient_id,
+                'name': name,
+                'measurement_unit': unit,
+                'amount': amount,
+            })
+        for recipe in recipes:
+            recipe['ingredients'] = ingredients[recipe['id']]
+
+    @classmethod
+    def load_ingredients(cls, recipes):
+        if recipes:
+            cls.attach_ingredients(recipes, cls.ingredient_rows(
+                [recipe['id'] for recipe in recipes]
+            ))
+
+    @classmethod
+    async def aload_ingredients(cls, recipes):
+        if recipes:
+            cls.attach_ingredients(recipes, [
+                row async for row in cls.ingredient_rows(
+                    [recipe['id'] for recipe in recipes]
+                )
+            ])
+
+    def is_subscribed(self, author_id):
+        subscribed_author_ids = self.context.get('subscribed_author_ids')
+        if subscribed_author_ids is not None:
+            return author_id in subscribed_author_ids
+        user = self.context['request'].user
+        return (
+            user.is_authenticated
+            and user.subscribers.filter(author_id=author_id).exists()
+        )
+
+    def to_representation(self, recipe):
+        if 'ingredients' not in recipe:
+            self.load_ingredients([recipe])
+        return {
+            'id': recipe['id'],
+            'name': recipe['name'],
+            'text': recipe['text'],
+            'author': {
+                'id': recipe['author_id'],
+                'email': recipe['author__email'],
+                'username': recipe['author__username'],
+                'first_name': recipe['author__first_name'],
+                'last_name': recipe['author__last_name'],
+                'avatar': media_url(recipe['author__avatar']),
+                'avatar_variants': variant_urls_for_name(
+                    recipe['author__avatar'], AVATAR_VARIANTS
+                ),
+                'is_subscribed': self.is_subscribed(recipe['author_id']),
+            },
+            'image': media_url(recipe['image']),
+            'image_variants': variant_urls_for_name(
+                recipe['image'], RECIPE_IMAGE_VARIANTS
+            ),
+            'ingredients': recipe['ingredients'],
+            'cooking_time': recipe['cooking_time'],
+            'is_favorited': (
+                recipe['id'] in self.context.get('favorited_recipe_ids', ())
+            ),
+            'is_in_shopping_cart': (
+                recipe['id'] in self.context.get('carted_recipe_ids', ())
+            ),
+        }
+
 
 class RecipeCreateUpdateSerializer(serializers.ModelSerializer):
     ingredients = RecipeIngredientCreateSerializer(many=True)
@@ -125,16 +317,26 @@ class RecipeCreateUpdateSerializer(serializers.ModelSerializer):
         model = Recipe
         fields = ('id', 'name', 'text', 'ingredients', 'image', 'cooking_time')
 
+    @transaction.atomic
     def create(self, validated_data):
         ingredients = validated_data.pop('ingredients')
         recipe = super().create(validated_data)
-        self.recreate_ingredients(recipe, ingredients)
+        self.sync_ingredients(recipe, ingredients, created=True)
+        update_search_index([recipe.id])
+        schedule_variants(recipe.image.name, RECIPE_IMAGE_VARIANTS)
         return recipe
 
+    @transaction.atomic
     def update(self, recipe, validated_data):
         ingredients = validated_data.pop('ingredients')
-        self.recreate_ingredients(recipe, ingredients)
-        return super().update(recipe, validated_data)
+        old_image = recipe.image.name
+        self.sync_ingredients(recipe, ingredients)
+        recipe = super().update(recipe, validated_data)
+        update_search_index([recipe.id])
+        if recipe.image.name != old_image:
+            delete_later(old_image, RECIPE_IMAGE_VARIANTS)
+            schedule_variants(recipe.image.name, RECIPE_IMAGE_VARIANTS)
+        return recipe
 
     def validate(self, data):
         ingredients = data.get('ingredients')
@@ -143,33 +345,92 @@ class RecipeCreateUpdateSerializer(serializers.ModelSerializer):
                 'ingredients': 'Нужно добавить продукты'
             })
 
-        ingredients_list = []
-        for ingredient in ingredients:
-            if ingredient['ingredient'] in ingredients_list:
-                raise serializers.ValidationError({
-                    'ingredients': 'Продукты должны быть уникальными'
-                })
-            ingredients_list.append(ingredient['ingredient'])
+        ingredient_ids = {
+            ingredient['ingredient_id'] for ingredient in ingredients
+        }
+        if len(ingredient_ids) != len(ingredients):
+            raise serializers.ValidationError({
+                'ingredients': 'Продукты должны быть уникальными'
+            })
+        found = Ingredient.objects.only('id').in_bulk(ingredient_ids)
+        missing = sorted(ingredient_ids - found.keys())
+        if missing:
+            raise serializers.ValidationError({
+                'ingredients': f'Продукты не найдены: {missing}'
+            })
         return data
 
-    def recreate_ingredients(self, recipe, ingredients):
-        recipe.recipe_ingredients.all().delete()
-        RecipeIngredient.objects.bulk_create(
-            RecipeIngredient(
-                recipe=recipe,
-                ingredient=ingredient['ingredient'],
-                amount=ingredient['amount']
-            )
+    def sync_ingredients(self, recipe, ingredients, created=False):
+        new_amounts = {
+            ingredient['ingredient_id']: ingredient['amount']
             for ingredient in ingredients
-        )
+        }
+        current = {} if created else {
+            recipe_ingredient.ingredient_id: recipe_ingredient
+            for recipe_ingredient in recipe.recipe_ingredients.all()
+        }
+        removed = current.keys() - new_amounts.keys()
+        added = new_amounts.keys() - current.keys()
+        changed = []
+        deltas = {}
+        for ingredient_id, recipe_ingredient in current.items():
+            amount = new_amounts.get(ingredient_id, 0)
+            if amount != recipe_ingredient.amount:
+                deltas[ingredient_id] = amount - recipe_ingredient.amount
+                if ingredient_id not in removed:
+                    recipe_ingredient.amount = amount
+                    changed.append(recipe_ingredient)
+
+        if removed:
+            # Одним DELETE без сигналов post_delete: счётчики ниже.
+            removed_rows = recipe.recipe_ingredients.filter(
+                ingredient_id__in=removed
+            )
+            removed_rows._raw_delete(removed_rows.db)
+            Ingredient.objects.filter(id__in=removed).update(
+                recipes_count=Greatest(F('recipes_count') - 1, 0)
+            )
+        if changed:
+            RecipeIngredient.objects.bulk_update(changed, ['amount'])
+        if added:
+            RecipeIngredient.objects.bulk_create(
+                RecipeIngredient(
+                    recipe=recipe,
+                    ingredient_id=ingredient_id,
+                    amount=new_amounts[ingredient_id]
+                )
+                for ingredient_id in added
+            )
+            Ingredient.objects.filter(id__in=added).update(
+                recipes_count=F('recipes_count') + 1
+            )
+        if current:
+            deltas.update(
+                (ingredient_id, new_amounts[ingredient_id])
+                for ingredient_id in added
+            )
+            ShoppingListItem.objects.apply_deltas(
+                recipe.shoppingcart_by_users.values_list(
+                    'user_id', flat=True
+                ),
+                deltas
+            )
 
     def to_representation(self, recipe):
+        prefetch_related_objects([recipe], 'recipe_ingredients__ingredient')
         return RecipeSerializer(recipe, context=self.context).data
 
 
+def get_recipes_limit(request):
+    limit = request.query_params.get('recipes_limit') if request else None
+    if limit is not None and limit.isdigit() and int(limit) > 0:
+        return int(limit)
+    return None
+
+
 class GetUserSubscriptionSerializer(ExtendedUserSerializer):
     recipes = serializers.SerializerMethodField()
-    recipes_count = serializers.IntegerField(read_only=True, default=0)
+    recipes_count = serializers.IntegerField(read_only=True)
 
     class Meta:
         model = User
@@ -180,21 +441,19 @@ class GetUserSubscriptionSerializer(ExtendedUserSerializer):
             'last_name',
             'email',
             'avatar',
+            'avatar_variants',
             'recipes',
             'recipes_count',
             'is_subscribed',
         )
 
     def get_recipes(self, user):
-        request = self.context.get('request')
-        limit = request.query_params.get('recipes_limit') if request else None
-
-        if limit is not None and limit.isdigit():
-            limit = int(limit)
-            if limit > 0:
-                recipes = user.recipes.all()[:limit]
+        if hasattr(user, 'recent_recipes'):
+            recipes = user.recent_recipes
         else:
-            recipes = user.recipes.all()
+            recipes = user.recipes.all()[:get_recipes_limit(
+                self.context.get('request')
+            )]
 
         serializer = RecipeShortSerializer(
             recipes,
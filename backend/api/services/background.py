@@ -0,0 +1,25 @@
+from concurrent.futures import ThreadPoolExecutor
+import logging
+
+from django.conf import settings
+from django.db import transaction
+
+logger = logging.getLogger(__name__)
+
+_executor = ThreadPoolExecutor(
+    max_workers=settings.BACKGROUND_WORKERS,
+    thread_name_prefix='background'
+)
+
+
+def _run_safely(func, *args):
+    try:
+        func(*args)
+    except Exception:
+        logger.exception(
+            'Фоновая задача %s завершилась ошибкой', func.__name__
+        )
+
+
+def run_on_commit(func, *args):
+    transaction.on_commit(lambda: _executor.submit(_run_safely, func, *args))
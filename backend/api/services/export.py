@@ -0,0 +1,38 @@
+import csv
+import json
+
+
+class _EchoBuffer:
+    def write(self, value):
+        return value
+
+
+def iter_text(ingredients):
+    for idx, item in enumerate(ingredients, start=1):
+        yield (
+            f"{idx}. {item['name'].capitalize()} "
+            f"- {item['total_amount']}{item['measurement_unit']}\n"
+        )
+
+
+def iter_csv(ingredients):
+    writer = csv.writer(_EchoBuffer())
+    yield writer.writerow(('name', 'measurement_unit', 'total_amount'))
+    for item in ingredients:
+        yield writer.writerow((
+            item['name'], item['measurement_unit'], item['total_amount']
+        ))
+
+
+def iter_json(ingredients):
+    yield '['
+    for idx, item in enumerate(ingredients):
+        yield (',' if idx else '') + json.dumps(item, ensure_ascii=False)
+    yield ']'
+
+
+SHOPPING_LIST_EXPORTERS = {
+    'txt': iter_text,
+    'csv': iter_csv,
+    'json': iter_json,
+}
@@ -0,0 +1,69 @@
+import io
+import posixpath
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from PIL import Image
+
+from .background import run_on_commit
+
+VARIANT_SIZES = {
+    'card': (480, 480),
+    'detail': (1200, 1200),
+    'avatar': (160, 160),
+}
+RECIPE_IMAGE_VARIANTS = ('card', 'detail')
+AVATAR_VARIANTS = ('avatar',)
+VARIANT_FORMAT = 'WEBP'
+VARIANT_QUALITY = 80
+
+
+def variant_name(name, variant):
+    directory, filename = posixpath.split(name)
+    return posixpath.join(
+        directory, 'variants',
+        f'{filename}_{variant}.{VARIANT_FORMAT.lower()}'
+    )
+
+
+def generate_variants(name, variants):
+    with default_storage.open(name) as file, Image.open(file) as image:
+        image.draft('RGB', max(VARIANT_SIZES[v] for v in variants))
+        mode = 'RGBA' if image.mode in ('RGBA', 'LA', 'P') else 'RGB'
+        image = image.convert(mode)
+        for variant in variants:
+            resized = image.copy()
+            resized.thumbnail(VARIANT_SIZES[variant])
+            buffer = io.BytesIO()
+            resized.save(buffer, VARIANT_FORMAT, quality=VARIANT_QUALITY)
+            target = variant_name(name, variant)
+            default_storage.delete(target)
+            default_storage.save(target, ContentFile(buffer.getvalue()))
+
+
+def schedule_variants(name, variants):
+    if name:
+        run_on_commit(generate_variants, name, variants)
+
+
+def media_url(name):
+    return default_storage.url(name) if name else None
+
+
+def variant_urls(file, variants, request=None):
+    urls = variant_urls_for_name(file.name if file else None, variants)
+    if urls and request is not None:
+        urls = {
+            variant: request.build_absolute_uri(url)
+            for variant, url in urls.items()
+        }
+    return urls
+
+
+def variant_urls_for_name(name, variants):
+    if not name:
+        return None
+    return {
+        variant: default_storage.url(variant_name(name, variant))
+        for variant in variants
+    }
@@ -0,0 +1,49 @@
+from bisect import bisect_left
+from threading import Lock
+
+from recipes.models import Ingredient
+
+
+class IngredientPrefixIndex:
+    fields = ('id', 'name', 'measurement_unit')
+
+    def __init__(self):
+        self._lock = Lock()
+        self._index = (None, [], [])
+
+    def _store(self, version, rows):
+        rows = sorted(
+            rows, key=lambda row: (row['name'].casefold(), row['name'])
+        )
+        self._index = (version, [row['name'].casefold() for row in rows], rows)
+
+    def _refresh(self, version):
+        if version == self._index[0]:
+            return
+        with self._lock:
+            if version != self._index[0]:
+                self._store(version, Ingredient.objects.values(*self.fields))
+
+    async def arefresh(self, version):
+        if version != self._index[0]:
+            self._store(version, [
+                row async for row in Ingredient.objects.values(*self.fields)
+            ])
+
+    def all(self, version):
+        self._refresh(version)
+        return self._index[2]
+
+    def search(self, prefix, limit, version):
+        self._refresh(version)
+        _, keys, rows = self._index
+        prefix = prefix.casefold()
+        result = []
+        for idx in range(bisect_left(keys, prefix), len(keys)):
+            if len(result) >= limit or not keys[idx].startswith(prefix):
+                break
+            result.append(rows[idx])
+        return result
+
+
+ingredient_index = IngredientPrefixIndex()
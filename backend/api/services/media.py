@@ -0,0 +1,50 @@
+import posixpath
+
+from django.contrib.auth import get_user_model
+from django.core.files.storage import default_storage
+
+from recipes.models import Recipe
+
+from .background import run_on_commit
+from .images import variant_name
+
+User = get_user_model()
+
+MEDIA_FIELDS = (
+    Recipe._meta.get_field('image'),
+    User._meta.get_field('avatar'),
+)
+
+
+def _delete_files(names):
+    for name in names:
+        default_storage.delete(name)
+
+
+def is_referenced(name):
+    return any(
+        field.model.objects.filter(**{field.name: name}).exists()
+        for field in MEDIA_FIELDS
+        if name.startswith(field.upload_to)
+    )
+
+
+def is_variant_referenced(name, variant):
+    target = variant_name(name, variant)
+    prefix = posixpath.splitext(name)[0] + '.'
+    return any(
+        variant_name(other, variant) == target
+        for field in MEDIA_FIELDS
+        if name.startswith(field.upload_to)
+        for other in field.model.objects.filter(
+            **{f'{field.name}__startswith': prefix}
+        ).values_list(field.name, flat=True)
+    )
+
+
+def delete_later(name, variants=()):
+    if name and not is_referenced(name):
+        run_on_commit(_delete_files, [name] + [
+            variant_name(name, variant) for variant in variants
+            if not is_variant_referenced(name, variant)
+        ])
@@ -1,33 +1,86 @@
 from datetime import datetime
+from functools import cache
+import hashlib
 import io
+import json
+from tempfile import SpooledTemporaryFile
+
+from django.core.cache import cache as django_cache
 from reportlab.pdfbase import pdfmetrics
 from reportlab.pdfbase.ttfonts import TTFont
 from reportlab.pdfgen import canvas
 
+from api.constants import (
+    SHOPPING_LIST_PDF_CACHE_TIMEOUT,
+    SHOPPING_LIST_PDF_SPOOL_MAX_SIZE
+)
+
+FONT_NAME = 'DejaVuSans'
+FONT_SIZE = 12
+PAGE_TOP = 800
+PAGE_BOTTOM = 40
+LINE_HEIGHT = 20
+
+
+@cache
+def register_font():
+    pdfmetrics.registerFont(TTFont(FONT_NAME, 'DejaVuSans.ttf'))
+
 
 class IngredientPDFExporter:
     def __init__(self):
-        self._buffer = io.BytesIO()
-        self._pdf = canvas.Canvas(self._buffer)
-
-        pdfmetrics.registerFont(TTFont('DejaVuSans', 'DejaVuSans.ttf'))
-        self._pdf.setFont('DejaVuSans', 12)
+        register_font()
+        self._file = SpooledTemporaryFile(
+            max_size=SHOPPING_LIST_PDF_SPOOL_MAX_SIZE
+        )
+        self._pdf = canvas.Canvas(self._file)
+        self._date = datetime.now().strftime('%d.%m.%Y')
+        self._start_page()
 
-        self._pdf.drawString(100, 800, 'Список покупок')
-        self._pdf.drawString(400, 800, datetime.now().strftime('%d.%m.%Y'))
-        self._current_y = 780
+    def _start_page(self):
+        self._pdf.setFont(FONT_NAME, FONT_SIZE)
+        self._pdf.drawString(100, PAGE_TOP, 'Список покупок')
+        self._pdf.drawString(400, PAGE_TOP, self._date)
+        self._current_y = PAGE_TOP - LINE_HEIGHT
 
     def finalize(self):
         self._pdf.save()
-        self._buffer.seek(0)
-        return self._buffer
+        self._file.seek(0)
+        return self._file
 
     def add_items(self, ingredients):
         for idx, item in enumerate(ingredients, start=1):
+            if self._current_y < PAGE_BOTTOM:
+                self._pdf.showPage()
+                self._start_page()
             self._pdf.drawString(
                 100,
                 self._current_y,
                 f"{idx}. {item['name'].capitalize()} "
                 f"- {item['total_amount']}{item['measurement_unit']}"
             )
-            self._current_y -= 20
+            self._current_y -= LINE_HEIGHT
+
+    @classmethod
+    def export(cls, ingredients):
+        ingredients = list(ingredients)
+        digest = hashlib.sha256(json.dumps(
+            [datetime.now().strftime('%d.%m.%Y'), ingredients],
+            ensure_ascii=False,
+            sort_keys=True,
+            default=str
+        ).encode()).hexdigest()
+        cache_key = f'shopping-list-pdf:{digest}'
+        content = django_cache.get(cache_key)
+        if content is not None:
+            return io.BytesIO(content)
+        exporter = cls()
+        exporter.add_items(ingredients)
+        file = exporter.finalize()
+        if file.seek(0, io.SEEK_END) <= SHOPPING_LIST_PDF_SPOOL_MAX_SIZE:
+            file.seek(0)
+            django_cache.set(
+                cache_key, file.read(), SHOPPING_LIST_PDF_CACHE_TIMEOUT
+            )
+        file.seek(0)
+        return file
@@ -0,0 +1,65 @@
+import hashlib
+
+from django.conf import settings
+from django.core.cache import caches
+
+
+class ResponseCache:
+    def __init__(self, prefix):
+        self.prefix = prefix
+
+    @property
+    def backend(self):
+        return caches[settings.RECIPE_LIST_CACHE['ALIAS']]
+
+    def make_key(self, version, *parts):
+        digest = hashlib.sha256(repr(parts).encode()).hexdigest()
+        return f'{self.prefix}:{version}:{digest}'
+
+    def get(self, key):
+        content = self.backend.get(key)
+        self._count('hits' if content is not None else 'misses')
+        return content
+
+    async def aget(self, key):
+        content = await self.backend.aget(key)
+        await self._acount('hits' if content is not None else 'misses')
+        return content
+
+    def set(self, key, content):
+        self.backend.set(
+            key, content, settings.RECIPE_LIST_CACHE['TIMEOUT']
+        )
+
+    async def aset(self, key, content):
+        await self.backend.aset(
+            key, content, settings.RECIPE_LIST_CACHE['TIMEOUT']
+        )
+
+    def stats(self):
+        stats = {
+            name: self.backend.get(f'{self.prefix}:{name}', 0)
+            for name in ('hits', 'misses')
+        }
+        total = stats['hits'] + stats['misses']
+        stats['hit_ratio'] = stats['hits'] / total if total else None
+        return stats
+
+    def _count(self, name):
+        key = f'{self.prefix}:{name}'
+        self.backend.add(key, 0, None)
+        try:
+            self.backend.incr(key)
+        except ValueError:
+            self.backend.set(key, 1, None)
+
+    async def _acount(self, name):
+        key = f'{self.prefix}:{name}'
+        await self.backend.aadd(key, 0, None)
+        try:
+            await self.backend.aincr(key)
+        except ValueError:
+            await self.backend.aset(key, 1, None)
+
+
+recipe_list_cache = ResponseCache('recipe-list')
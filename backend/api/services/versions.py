@@ -0,0 +1,54 @@
+from time import time
+from uuid import uuid4
+
+from asgiref.sync import sync_to_async
+
+from recipes.models import DataVersion
+
+INGREDIENTS = 'ingredients-version'
+RECIPES = 'recipes-version'
+
+
+def bump(key):
+    values = {'tag': uuid4().hex, 'modified': time()}
+    if not DataVersion.objects.filter(key=key).update(**values):
+        DataVersion.objects.bulk_create(
+            [DataVersion(key=key, **values)], ignore_conflicts=True
+        )
+
+
+def query(key):
+    return DataVersion.objects.filter(key=key).values_list('tag', 'modified')
+
+
+def load(key):
+    version = query(key).first()
+    if version is None:
+        bump(key)
+        version = load(key)
+    return version
+
+
+async def aload(key):
+    version = await query(key).afirst()
+    if version is None:
+        await sync_to_async(bump)(key)
+        version = await aload(key)
+    return version
+
+
+def get(key, request=None):
+    memo = getattr(request, '_data_versions', {})
+    if key not in memo:
+        memo[key] = load(key)
+        if request is not None:
+            request._data_versions = memo
+    return memo[key]
+
+
+async def aget(key, request):
+    memo = getattr(request, '_data_versions', {})
+    if key not in memo:
+        memo[key] = await aload(key)
+        request._data_versions = memo
+    return memo[key]
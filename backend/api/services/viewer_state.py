@@ -0,0 +1,86 @@
+from collections import namedtuple
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from django.db.models import Value
+
+from recipes.models import FavoriteRecipe, ShoppingCart
+
+ViewerState = namedtuple('ViewerState', ('favorites', 'cart'))
+
+EMPTY_STATE = ViewerState(frozenset(), frozenset())
+
+
+def get_cache():
+    return caches[settings.VIEWER_STATE_CACHE['ALIAS']]
+
+
+def make_key(user_id):
+    return f'viewer-state:{user_id}'
+
+
+def query(user_id):
+    return FavoriteRecipe.objects.filter(user_id=user_id).values_list(
+        'recipe_id', Value(True)
+    ).order_by().union(
+        ShoppingCart.objects.filter(user_id=user_id).values_list(
+            'recipe_id', Value(False)
+        ).order_by(),
+        all=True
+    )
+
+
+def build(rows):
+    favorites, cart = set(), set()
+    for recipe_id, is_favorite in rows:
+        (favorites if is_favorite else cart).add(recipe_id)
+    return ViewerState(frozenset(favorites), frozenset(cart))
+
+
+def load(user_id):
+    return build(query(user_id))
+
+
+async def aload(user_id):
+    return build([row async for row in query(user_id)])
+
+
+def get_viewer_state(request):
+    state = getattr(request, '_viewer_state', None)
+    if state is not None:
+        return state
+    if not request.user.is_authenticated:
+        state = EMPTY_STATE
+    else:
+        key = make_key(request.user.id)
+        state = get_cache().get(key)
+        if state is None:
+            state = load(request.user.id)
+            get_cache().set(
+                key, state, settings.VIEWER_STATE_CACHE['TIMEOUT']
+            )
+    request._viewer_state = state
+    return state
+
+
+async def aget_viewer_state(request, user):
+    state = getattr(request, '_viewer_state', None)
+    if state is not None:
+        return state
+    if not user.is_authenticated:
+        state = EMPTY_STATE
+    else:
+        key = make_key(user.id)
+        state = await get_cache().aget(key)
+        if state is None:
+            state = await aload(user.id)
+            await get_cache().aset(
+                key, state, settings.VIEWER_STATE_CACHE['TIMEOUT']
+            )
+    request._viewer_state = state
+    return state
+
+
+def forget(user_id):
+    transaction.on_commit(lambda: get_cache().delete(make_key(user_id)))
@@ -0,0 +1,69 @@
+from django.contrib.auth import get_user_model
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from rest_framework.authtoken.models import Token
+
+from recipes.models import FavoriteRecipe, Ingredient, Recipe, ShoppingCart
+
+from .authentication import forget_tokens
+from .services import versions, viewer_state
+from .services.images import AVATAR_VARIANTS, RECIPE_IMAGE_VARIANTS
+from .services.media import delete_later
+
+User = get_user_model()
+
+
+@receiver(post_save, sender=Ingredient)
+@receiver(post_delete, sender=Ingredient)
+def bump_ingredients_version(**kwargs):
+    versions.bump(versions.INGREDIENTS)
+    versions.bump(versions.RECIPES)
+
+
+@receiver(post_save, sender=Recipe)
+@receiver(post_delete, sender=Recipe)
+@receiver(post_delete, sender=User)
+def bump_recipes_version(**kwargs):
+    versions.bump(versions.RECIPES)
+
+
+@receiver(post_save, sender=User)
+def bump_recipes_version_on_profile_change(
+    created, update_fields=None, **kwargs
+):
+    if created:
+        return
+    if update_fields is None or set(update_fields) - {'last_login'}:
+        versions.bump(versions.RECIPES)
+
+
+@receiver(post_delete, sender=Recipe)
+def delete_recipe_image(instance, **kwargs):
+    delete_later(instance.image.name, RECIPE_IMAGE_VARIANTS)
+
+
+@receiver(post_delete, sender=User)
+def delete_user_avatar(instance, **kwargs):
+    delete_later(instance.avatar.name, AVATAR_VARIANTS)
+
+
+@receiver(post_delete, sender=Token)
+def forget_deleted_token(instance, **kwargs):
+    forget_tokens([instance.key])
+
+
+@receiver(post_save, sender=User)
+def forget_user_tokens(instance, created, update_fields=None, **kwargs):
+    if created or (update_fields and set(update_fields) == {'last_login'}):
+        return
+    forget_tokens(Token.objects.filter(user=instance).values_list(
+        'key', flat=True
+    ))
+
+
+@receiver(post_save, sender=FavoriteRecipe)
+@receiver(post_save, sender=ShoppingCart)
+@receiver(post_delete, sender=FavoriteRecipe)
+@receiver(post_delete, sender=ShoppingCart)
+def forget_viewer_state(instance, **kwargs):
+    viewer_state.forget(instance.user_id)
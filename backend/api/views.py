@@ -1,50 +1,95 @@
 from django.contrib.auth import get_user_model
-from django.http import FileResponse
-from django.db.models import OuterRef, Exists, Prefetch, Sum, F, Count
+from django.http import FileResponse, StreamingHttpResponse
+from django.db import transaction
+from django.db.models import Prefetch, F
 from django.shortcuts import get_object_or_404
 from django.urls import reverse
 from django_filters.rest_framework import DjangoFilterBackend
 
-from rest_framework import status, viewsets, filters
+from rest_framework import status, viewsets
 from rest_framework.decorators import action
 from rest_framework.exceptions import ValidationError
 from rest_framework.permissions import (
+    IsAdminUser,
     IsAuthenticated,
     IsAuthenticatedOrReadOnly
 )
+from rest_framework.renderers import JSONRenderer
 from rest_framework.response import Response
 
 from djoser.views import UserViewSet as DjoserUserViewSet
 
+from recipes.shortlinks import encode, recipe_exists
 from users.models import UserSubscription
 from recipes.models import (
     Recipe,
     FavoriteRecipe,
     ShoppingCart,
     Ingredient,
-    RecipeIngredient
+    ShoppingListItem
 )
 
-from .paginators import CustomPagePagination
+from .constants import INGREDIENT_SEARCH_LIMIT, RECIPE_LIST_CACHE_PARAMS
+from .mixins import AnonymousListCacheMixin, ConditionalGetMixin
+from .paginators import (
+    RecipeCursorPagination,
+    RecipePagination,
+    SubscriptionPagination
+)
 from .permissions import IsOwnerOrReadOnly
+from .renderers import SHOPPING_LIST_RENDERERS
 from .serializers import (
     ExtendedUserSerializer,
     UserAvatarSerializer,
     IngredientSerializer,
     GetUserSubscriptionSerializer,
     RecipeCreateUpdateSerializer,
+    RecipeReadSerializer,
     RecipeSerializer, RecipeShortSerializer,
-    SubscriptionCreateSerializer
+    SubscriptionCreateSerializer,
+    get_recipes_limit
+)
+from .filters import (
+    IngredientSearchFilter,
+    RecipeFullTextSearchFilter,
+    RecipeSearchFilter
 )
-from .filters import IngredientSearchFilter, RecipeSearchFilter
+from .services.export import SHOPPING_LIST_EXPORTERS
+from .services.images import AVATAR_VARIANTS
+from .services.media import delete_later
+from .services.ingredient_index import ingredient_index
+from .services import versions
 from .services.pdf import IngredientPDFExporter
+from .services.response_cache import recipe_list_cache
+from .services.viewer_state import get_viewer_state
 
 
 User = get_user_model()
 
 
-class UserViewSet(DjoserUserViewSet):
+class SubscribedAuthorsContextMixin:
+    """Один запрос подписок на весь ответ вместо запроса на каждого автора."""
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        user = self.request.user
+        context['subscribed_author_ids'] = (
+            set(user.subscribers.values_list('author_id', flat=True))
+            if user.is_authenticated else set()
+        )
+        return context
+
+
+class UserViewSet(SubscribedAuthorsContextMixin, DjoserUserViewSet):
     serializer_class = ExtendedUserSerializer
+    query_budgets = {
+        'list': 5,
+        'retrieve': 4,
+        'me': 3,
+        'subscriptions': 6,
+        'subscribe': 12,
+        'unsubscribe': 6,
+    }
 
     @action(
         detail=False,
@@ -83,7 +128,9 @@ class UserViewSet(DjoserUserViewSet):
     def delete_avatar(self, request):
         user = request.user
         if user.avatar:
-            user.avatar.delete()
+            delete_later(user.avatar.name, AVATAR_VARIANTS)
+            user.avatar = None
+            user.save(update_fields=['avatar'])
         return Response(status=status.HTTP_204_NO_CONTENT)
 
     @action(
@@ -100,7 +147,8 @@ class UserViewSet(DjoserUserViewSet):
             data={'user': user.id, 'author': author.id}
         )
         serializer.is_valid(raise_exception=True)
-        serializer.save()
+        with transaction.atomic():
+            serializer.save()
 
         return Response(
             GetUserSubscriptionSerializer(
@@ -126,57 +174,93 @@ class UserViewSet(DjoserUserViewSet):
         detail=False,
         methods=['get'],
         url_path='subscriptions',
-        permission_classes=[IsAuthenticated]
+        permission_classes=[IsAuthenticated],
+        pagination_class=SubscriptionPagination
     )
     def subscriptions(self, request):
+        recipes = Recipe.objects.only(
+            'id', 'name', 'image', 'cooking_time', 'author'
+        )[:get_recipes_limit(request)]
         subscriptions = User.objects.filter(
             authors__user=self.request.user
-        ).annotate(
-            recipes_count=Count('recipes')
-        ).prefetch_related('recipes')
+        ).prefetch_related(
+            Prefetch('recipes', queryset=recipes, to_attr='recent_recipes')
+        )
         paginated_subscriptions = self.paginate_queryset(subscriptions)
         serializer = GetUserSubscriptionSerializer(
             paginated_subscriptions,
             many=True,
-            context={'request': request}
+            context=self.get_serializer_context()
         )
         return self.get_paginated_response(serializer.data)
 
 
-class IngredientViewSet(viewsets.ReadOnlyModelViewSet):
+class IngredientViewSet(ConditionalGetMixin, viewsets.ReadOnlyModelViewSet):
     serializer_class = IngredientSerializer
     filter_backends = [DjangoFilterBackend]
     filterset_class = IngredientSearchFilter
     queryset = Ingredient.objects.all()
     pagination_class = None
+    cache_version_key = versions.INGREDIENTS
+
+    def list(self, request, *args, **kwargs):
+        return self.conditional_get(self.list_from_index, request)
 
+    def list_from_index(self, request):
+        version, _ = versions.get(self.cache_version_key, request)
+        name = request.query_params.get('name')
+        if name:
+            return Response(ingredient_index.search(
+                name, INGREDIENT_SEARCH_LIMIT, version
+            ))
+        return Response(ingredient_index.all(version))
 
-class RecipeViewSet(viewsets.ModelViewSet):
+
+class RecipeViewSet(
+    ConditionalGetMixin,
+    AnonymousListCacheMixin,
+    SubscribedAuthorsContextMixin,
+    viewsets.ModelViewSet
+):
     serializer_class = RecipeSerializer
-    pagination_class = CustomPagePagination
+    pagination_class = RecipePagination
     permission_classes = (IsAuthenticatedOrReadOnly, IsOwnerOrReadOnly)
-    filter_backends = (DjangoFilterBackend, filters.SearchFilter)
-    search_fields = ('name', 'author__username')
+    filter_backends = (DjangoFilterBackend, RecipeFullTextSearchFilter)
     filterset_class = RecipeSearchFilter
+    cache_version_key = versions.RECIPES
+    cache_query_params = RECIPE_LIST_CACHE_PARAMS
+    response_cache = recipe_list_cache
+    query_budgets = {
+        'list': 6,
+        'retrieve': 5,
+        'feed': 5,
+        'cache_stats': 1,
+        'favorite': 6,
+        'get_link': 2,
+        'download_shopping_cart': 3,
+    }
+
+    def allows_conditional_get(self, request):
+        return not request.user.is_authenticated
+
+    def uses_values_read_path(self):
+        return self.action in ('list', 'retrieve', 'feed') and isinstance(
+            getattr(self.request, 'accepted_renderer', None), JSONRenderer
+        )
 
     def get_queryset(self):
-        base_queryset = Recipe.objects.select_related('author').prefetch_related(
-            'ingredients', 'recipe_ingredients__ingredient'
+        if self.uses_values_read_path():
+            return Recipe.objects.values(*RecipeReadSerializer.source_fields)
+        return Recipe.objects.select_related('author').prefetch_related(
+            'recipe_ingredients__ingredient'
         )
-        if self.request.user.is_authenticated:
-            base_queryset = base_queryset.annotate(
-                is_in_shopping_cart=Exists(
-                    ShoppingCart.objects.filter(
-                        user=self.request.user, recipe=OuterRef('pk')
-                    )
-                ),
-                is_favorited=Exists(
-                    FavoriteRecipe.objects.filter(
-                        user=self.request.user, recipe=OuterRef('pk')
-                    )
-                )
-            )
-        return base_queryset
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        state = get_viewer_state(self.request)
+        context['favorited_recipe_ids'] = state.favorites
+        context['carted_recipe_ids'] = state.cart
+        return context
 
     @action(
         detail=True,
@@ -213,7 +297,7 @@ class RecipeViewSet(viewsets.ModelViewSet):
         url_path='get-link',
     )
     def get_link(self, request, pk):
-        if not Recipe.objects.filter(id=pk).exists():
+        if not pk.isdigit() or not recipe_exists(int(pk)):
             return Response(
                 {'error': 'Рецепт не найден'},
                 status=status.HTTP_404_NOT_FOUND
@@ -222,8 +306,8 @@ class RecipeViewSet(viewsets.ModelViewSet):
             {
                 'short-link': request.build_absolute_uri(
                     reverse(
-                        'recipes:redirect_to_recipe',
-                        kwargs={'recipe_id': pk}
+                        'recipes:redirect_short_link',
+                        kwargs={'code': encode(int(pk))}
                     )
                 )
             },
@@ -233,29 +317,59 @@ class RecipeViewSet(viewsets.ModelViewSet):
     @action(
         detail=False,
         methods=['get'],
-        permission_classes=[IsAuthenticated]
+        permission_classes=(IsAuthenticated,),
+        pagination_class=RecipeCursorPagination
+    )
+    def feed(self, request):
+        recipes = self.paginate_queryset(self.get_queryset().filter(
+            author_id__in=request.user.subscribers.values('author_id')
+        ))
+        serializer = self.get_serializer(recipes, many=True)
+        return self.get_paginated_response(serializer.data)
+
+    @action(
+        detail=False,
+        methods=['get'],
+        url_path='cache-stats',
+        permission_classes=(IsAdminUser,)
+    )
+    def cache_stats(self, request):
+        return Response(recipe_list_cache.stats())
+
+    @action(
+        detail=False,
+        methods=['get'],
+        permission_classes=[IsAuthenticated],
+        renderer_classes=SHOPPING_LIST_RENDERERS
     )
     def download_shopping_cart(self, request):
-        pdf_creator = IngredientPDFExporter()
         ingredients = self.get_all_ingredients_for_shopping(request.user)
-        pdf_creator.add_items(ingredients)
-        buffer = pdf_creator.finalize()
-        return FileResponse(
-            buffer,
-            as_attachment=True,
-            filename='ingredients.pdf'
+        renderer = request.accepted_renderer
+        if renderer.format == 'pdf':
+            return FileResponse(
+                IngredientPDFExporter.export(ingredients),
+                as_attachment=True,
+                filename='ingredients.pdf'
+            )
+        response = StreamingHttpResponse(
+            SHOPPING_LIST_EXPORTERS[renderer.format](ingredients.iterator()),
+            content_type=f'{renderer.media_type}; charset=utf-8'
+        )
+        response['Content-Disposition'] = (
+            f'attachment; filename="ingredients.{renderer.format}"'
         )
+        return response
 
     @staticmethod
     def get_all_ingredients_for_shopping(user):
         ingredients = (
-            RecipeIngredient.objects
-            .filter(recipe__shoppingcart_by_users__user=user)
+            ShoppingListItem.objects
+            .filter(user=user)
             .values(
+                'total_amount',
                 name=F('ingredient__name'),
                 measurement_unit=F('ingredient__measurement_unit')
             )
-            .annotate(total_amount=Sum('amount'))
             .order_by('ingredient__name')
         )
         return ingredients
@@ -269,10 +383,11 @@ class RecipeViewSet(viewsets.ModelViewSet):
             raise ValidationError(
                 f'Рецепт уже есть в {model._meta.verbose_name}!'
             )
-        model.objects.create(
-            user=self.request.user,
-            recipe=recipe
-        )
+        with transaction.atomic():
+            model.objects.create(
+                user=self.request.user,
+                recipe=recipe
+            )
         serializer = RecipeShortSerializer(
             instance=recipe
         )
@@ -290,4 +405,6 @@ class RecipeViewSet(viewsets.ModelViewSet):
     def get_serializer_class(self):
         if self.action in ['create', 'update', 'partial_update']:
             return RecipeCreateUpdateSerializer
+        if self.uses_values_read_path():
+            return RecipeReadSerializer
         return super().get_serializer_class()
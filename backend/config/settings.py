@@ -41,7 +41,10 @@ if DEBUG:
 
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework.authentication.TokenAuthentication'
+        os.getenv(
+            'TOKEN_AUTHENTICATION_CLASS',
+            'api.authentication.CachedTokenAuthentication'
+        )
     ],
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.AllowAny'
@@ -78,6 +81,7 @@ if DEBUG:
 MIDDLEWARE = [
     'debug_toolbar.middleware.DebugToolbarMiddleware',
     'django.middleware.security.SecurityMiddleware',
+    'api.middleware.QueryInstrumentationMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -86,8 +90,26 @@ MIDDLEWARE = [
     'django.middleware.clickjacking.XFrameOptionsMiddleware'
 ]
 
+QUERY_INSTRUMENTATION = {
+    'ENABLED': int(os.getenv('QUERY_INSTRUMENTATION', '0')),
+    'STRICT': int(os.getenv('QUERY_BUDGETS_STRICT', '0')),
+}
 
-ROOT_URLCONF = 'config.urls'
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {'class': 'logging.StreamHandler'},
+    },
+    'loggers': {
+        'api': {
+            'handlers': ['console'],
+            'level': os.getenv('API_LOG_LEVEL', 'INFO'),
+        },
+    },
+}
+
+ROOT_URLCONF = os.getenv('ROOT_URLCONF', 'config.urls')
 
 TEMPLATES = [
     {
@@ -132,6 +154,35 @@ else:
         }
     }
 
+CACHES = {
+    'default': {
+        'BACKEND': os.getenv(
+            'CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache'
+        ),
+        'LOCATION': os.getenv('CACHE_LOCATION', ''),
+    }
+}
+
+RECIPE_LIST_CACHE = {
+    'ALIAS': os.getenv('RECIPE_LIST_CACHE_ALIAS', 'default'),
+    'TIMEOUT': int(os.getenv('RECIPE_LIST_CACHE_TIMEOUT', 5 * 60)),
+}
+
+TOKEN_CACHE = {
+    'ALIAS': os.getenv('TOKEN_CACHE_ALIAS', 'default'),
+    'TIMEOUT': int(os.getenv('TOKEN_CACHE_TIMEOUT', 60)),
+}
+
+VIEWER_STATE_CACHE = {
+    'ALIAS': os.getenv('VIEWER_STATE_CACHE_ALIAS', 'default'),
+    'TIMEOUT': int(os.getenv('VIEWER_STATE_CACHE_TIMEOUT', 10 * 60)),
+}
+
+SHORT_LINK_CACHE = {
+    'ALIAS': os.getenv('SHORT_LINK_CACHE_ALIAS', 'default'),
+    'TIMEOUT': int(os.getenv('SHORT_LINK_CACHE_TIMEOUT', 60 * 60)),
+}
+
 AUTH_USER_MODEL = 'users.User'
 
 
@@ -170,6 +221,8 @@ USE_TZ = True
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 MEDIA_URL = '/media/'
 
+BACKGROUND_WORKERS = int(os.getenv('BACKGROUND_WORKERS', 2))
+
 
 STATIC_URL = 'static/'
 
@@ -0,0 +1,15 @@
+from django.urls import path
+
+from api import async_views
+from recipes import views as recipe_views
+
+from . import urls
+
+urlpatterns = [
+    path('s/<int:recipe_id>/', recipe_views.aredirect_to_recipe),
+    path('s/<str:code>/', recipe_views.aredirect_short_link),
+    path('api/recipes/', async_views.recipe_list),
+    path('api/recipes/<int:pk>/', async_views.recipe_detail),
+    path('api/ingredients/', async_views.ingredient_list),
+    path('api/ingredients/<int:pk>/', async_views.ingredient_detail),
+] + urls.urlpatterns
@@ -0,0 +1,17 @@
+import os
+
+SERVER_PROFILES = {
+    'wsgi': ('config.wsgi:application', 'sync'),
+    'asgi': ('config.asgi:application', 'uvicorn_worker.UvicornWorker'),
+}
+
+wsgi_app, worker_class = SERVER_PROFILES[os.getenv('SERVER_PROFILE', 'wsgi')]
+bind = os.getenv('GUNICORN_BIND', '0.0.0.0:8000')
+workers = int(os.getenv('GUNICORN_WORKERS', 1))
+timeout = int(os.getenv('GUNICORN_TIMEOUT', 30))
+
+if workers > 1 and 'locmem' in os.getenv('CACHE_BACKEND', 'locmem').lower():
+    raise RuntimeError(
+        'При GUNICORN_WORKERS > 1 нужен общий кэш: задайте CACHE_BACKEND '
+        'и CACHE_LOCATION (например, Redis или Memcached)'
+    )
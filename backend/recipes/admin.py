@@ -1,3 +1,5 @@
+from collections import Counter
+
 from django.contrib import admin
 from django.utils.safestring import mark_safe
 
@@ -6,8 +8,10 @@ from .models import (
     Ingredient,
     RecipeIngredient,
     FavoriteRecipe,
-    ShoppingCart
+    ShoppingCart,
+    ShoppingListItem
 )
+from .search import update_search_index
 
 
 class RecipeIngredientInlineAdmin(admin.TabularInline):
@@ -30,10 +34,27 @@ class FoodRecipeAdmin(admin.ModelAdmin):
     readonly_fields = ('image_preview_html',)
     inlines = [RecipeIngredientInlineAdmin]
 
+    def save_related(self, request, form, formsets, change):
+        recipe = form.instance
+        before = self.ingredient_amounts(recipe) if change else {}
+        super().save_related(request, form, formsets, change)
+        deltas = Counter(self.ingredient_amounts(recipe))
+        deltas.subtract(before)
+        ShoppingListItem.objects.apply_deltas(
+            recipe.shoppingcart_by_users.values_list('user_id', flat=True),
+            deltas
+        )
+        update_search_index([recipe.id])
+
+    @staticmethod
+    def ingredient_amounts(recipe):
+        return dict(recipe.recipe_ingredients.values_list(
+            'ingredient_id', 'amount'
+        ))
+
     def get_queryset(self, request):
         query_set = super().get_queryset(request)
         return query_set.select_related('author').prefetch_related(
-            'favoriterecipe_by_users',
             'recipe_ingredients__ingredient'
         )
 
@@ -41,10 +62,6 @@ class FoodRecipeAdmin(admin.ModelAdmin):
     def author_name(self, recipe):
         return recipe.author.username
 
-    @admin.display(description='В избранном')
-    def favorites_count(self, recipe):
-        return recipe.favoriterecipe_by_users.count()
-
     @admin.display(description='Изображение')
     @mark_safe
     def image_preview_html(self, recipe):
@@ -69,18 +86,10 @@ class FoodRecipeAdmin(admin.ModelAdmin):
 
 @admin.register(Ingredient)
 class FoodIngredientAdmin(admin.ModelAdmin):
-    list_display = ('name', 'measurement_unit', 'related_recipes_count')
+    list_display = ('name', 'measurement_unit', 'recipes_count')
     search_fields = ('name', 'measurement_unit')
     list_filter = ('measurement_unit',)
 
-    def get_queryset(self, request):
-        query_set = super().get_queryset(request)
-        return query_set.prefetch_related('ingredient_recipes')
-
-    @admin.display(description='Число рецептов')
-    def related_recipes_count(self, ingredient):
-        return ingredient.ingredient_recipes.count()
-
 
 class BaseUserRecipeAdmin(admin.ModelAdmin):
     search_fields = ('user__username', 'recipe__name')
@@ -0,0 +1,51 @@
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models import Count, F, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+from users.models import UserSubscription
+
+from .models import (
+    FavoriteRecipe,
+    Ingredient,
+    Recipe,
+    RecipeIngredient,
+    ShoppingCart
+)
+
+User = get_user_model()
+
+COUNTERS = (
+    (User, 'recipes_count', Recipe, 'author'),
+    (User, 'subscriptions_count', UserSubscription, 'user'),
+    (User, 'subscribers_count', UserSubscription, 'author'),
+    (Recipe, 'favorites_count', FavoriteRecipe, 'recipe'),
+    (Recipe, 'in_carts_count', ShoppingCart, 'recipe'),
+    (Ingredient, 'recipes_count', RecipeIngredient, 'ingredient'),
+)
+
+
+def actual_count(related_model, related_field):
+    return Coalesce(
+        Subquery(
+            related_model.objects
+            .filter(**{related_field: OuterRef('pk')})
+            .order_by()
+            .values(related_field)
+            .annotate(total=Count('pk'))
+            .values('total')
+        ),
+        0
+    )
+
+
+def reconcile(model, field, related_model, related_field):
+    actual = actual_count(related_model, related_field)
+    with transaction.atomic():
+        drifted = model.objects.annotate(
+            actual=actual
+        ).exclude(**{field: F('actual')}).values_list('pk', flat=True)
+        fixed = model.objects.filter(pk__in=list(drifted)).update(
+            **{field: actual}
+        )
+    return fixed
@@ -0,0 +1,268 @@
+import csv
+import json
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.utils.dateparse import parse_datetime
+
+from api.services import versions
+from users.models import UserSubscription
+
+from .counters import COUNTERS, reconcile
+from .models import (
+    FavoriteRecipe,
+    Ingredient,
+    Recipe,
+    RecipeIngredient,
+    ShoppingCart,
+    ShoppingListItem
+)
+from .search import rebuild_search_index
+
+User = get_user_model()
+
+FORMATS = ('jsonl', 'csv')
+
+
+class ImportedIds:
+    def __init__(self):
+        self.ids = {}
+
+    def load(self, values):
+        pass
+
+    def get(self, value):
+        return self.ids.get(value)
+
+
+class NaturalKeys(ImportedIds):
+    def __init__(self, model, field):
+        super().__init__()
+        self.model = model
+        self.field = field
+
+    def load(self, values):
+        missing = {value for value in values if value not in self.ids}
+        if missing:
+            self.ids.update(
+                self.model.objects
+                .filter(**{f'{self.field}__in': missing})
+                .values_list(self.field, 'id')
+            )
+
+
+class Entity:
+    model = None
+    fields = ()
+    export_fields = ()
+    ignore_conflicts = False
+
+    def export_rows(self):
+        return self.model.objects.order_by('pk').values_list(
+            *self.export_fields
+        )
+
+    def prepare(self, rows, keys):
+        pass
+
+    def build(self, row, keys):
+        raise NotImplementedError
+
+    def remember(self, rows, objects, keys):
+        pass
+
+
+class IngredientEntity(Entity):
+    model = Ingredient
+    fields = export_fields = ('name', 'measurement_unit')
+    ignore_conflicts = True
+
+    def build(self, row, keys):
+        return Ingredient(
+            name=row['name'], measurement_unit=row['measurement_unit']
+        )
+
+    def remember(self, rows, objects, keys):
+        keys['ingredients'].load(row['name'] for row in rows)
+
+
+class UserEntity(Entity):
+    model = User
+    fields = export_fields = (
+        'email', 'username', 'first_name', 'last_name', 'password'
+    )
+    ignore_conflicts = True
+
+    def build(self, row, keys):
+        return User(
+            email=row['email'],
+            username=row['username'],
+            first_name=row['first_name'],
+            last_name=row['last_name'],
+            password=row.get('password') or make_password(None),
+        )
+
+    def remember(self, rows, objects, keys):
+        keys['users'].load(row['email'] for row in rows)
+
+
+class RecipeEntity(Entity):
+    model = Recipe
+    fields = (
+        'id', 'author', 'name', 'text', 'cooking_time', 'image', 'pub_date'
+    )
+    export_fields = (
+        'id', 'author__email', 'name', 'text', 'cooking_time', 'image',
+        'pub_date'
+    )
+
+    def prepare(self, rows, keys):
+        keys['users'].load(row['author'] for row in rows)
+
+    def build(self, row, keys):
+        author_id = keys['users'].get(row['author'])
+        if author_id is None:
+            return None
+        return Recipe(
+            author_id=author_id,
+            name=row['name'],
+            text=row['text'],
+            cooking_time=int(row['cooking_time']),
+            image=row['image'],
+        )
+
+    def remember(self, rows, objects, keys):
+        for row, recipe in zip(
+            (row for row in rows if keys['users'].get(row['author'])),
+            objects
+        ):
+            keys['recipes'].ids[int(row['id'])] = recipe.id
+            if row.get('pub_date'):
+                recipe.pub_date = (
+                    parse_datetime(str(row['pub_date'])) or recipe.pub_date
+                )
+        Recipe.objects.bulk_update(objects, ['pub_date'])
+
+
+class RecipeIngredientEntity(Entity):
+    model = RecipeIngredient
+    fields = ('recipe', 'ingredient', 'amount')
+    export_fields = ('recipe_id', 'ingredient__name', 'amount')
+    ignore_conflicts = True
+
+    def prepare(self, rows, keys):
+        keys['recipes'].load(int(row['recipe']) for row in rows)
+        keys['ingredients'].load(row['ingredient'] for row in rows)
+
+    def build(self, row, keys):
+        recipe_id = keys['recipes'].get(int(row['recipe']))
+        ingredient_id = keys['ingredients'].get(row['ingredient'])
+        if recipe_id is None or ingredient_id is None:
+            return None
+        return RecipeIngredient(
+            recipe_id=recipe_id,
+            ingredient_id=ingredient_id,
+            amount=int(row['amount']),
+        )
+
+
+class UserRecipeEntity(Entity):
+    fields = ('user', 'recipe')
+    export_fields = ('user__email', 'recipe_id')
+    ignore_conflicts = True
+
+    def prepare(self, rows, keys):
+        keys['users'].load(row['user'] for row in rows)
+        keys['recipes'].load(int(row['recipe']) for row in rows)
+
+    def build(self, row, keys):
+        user_id = keys['users'].get(row['user'])
+        recipe_id = keys['recipes'].get(int(row['recipe']))
+        if user_id is None or recipe_id is None:
+            return None
+        return self.model(user_id=user_id, recipe_id=recipe_id)
+
+
+class FavoriteEntity(UserRecipeEntity):
+    model = FavoriteRecipe
+
+
+class CartEntity(UserRecipeEntity):
+    model = ShoppingCart
+
+
+class SubscriptionEntity(Entity):
+    model = UserSubscription
+    fields = ('user', 'author')
+    export_fields = ('user__email', 'author__email')
+    ignore_conflicts = True
+
+    def prepare(self, rows, keys):
+        keys['users'].load(row['user'] for row in rows)
+        keys['users'].load(row['author'] for row in rows)
+
+    def build(self, row, keys):
+        user_id = keys['users'].get(row['user'])
+        author_id = keys['users'].get(row['author'])
+        if user_id is None or author_id is None or user_id == author_id:
+            return None
+        return UserSubscription(user_id=user_id, author_id=author_id)
+
+
+ENTITIES = {
+    'ingredients': IngredientEntity(),
+    'users': UserEntity(),
+    'recipes': RecipeEntity(),
+    'recipe_ingredients': RecipeIngredientEntity(),
+    'favorites': FavoriteEntity(),
+    'carts': CartEntity(),
+    'subscriptions': SubscriptionEntity(),
+}
+
+
+def make_keys():
+    return {
+        'ingredients': NaturalKeys(Ingredient, 'name'),
+        'users': NaturalKeys(User, 'email'),
+        'recipes': ImportedIds(),
+    }
+
+
+def read_rows(path, file_format, fields, header=False):
+    with open(path, encoding='utf-8', newline='') as file:
+        if file_format == 'jsonl':
+            for line in file:
+                if line.strip():
+                    yield json.loads(line)
+            return
+        reader = csv.reader(file)
+        if header:
+            next(reader, None)
+        for values in reader:
+            if values:
+                yield dict(zip(fields, values))
+
+
+def write_rows(file, file_format, fields, rows, header=False):
+    if file_format == 'jsonl':
+        for values in rows:
+            file.write(json.dumps(
+                dict(zip(fields, values)), ensure_ascii=False, default=str
+            ) + '\n')
+            yield
+        return
+    writer = csv.writer(file)
+    if header:
+        writer.writerow(fields)
+    for values in rows:
+        writer.writerow(values)
+        yield
+
+
+def refresh_derived_data(batch_size):
+    for counter in COUNTERS:
+        reconcile(*counter)
+    ShoppingListItem.objects.rebuild_all(batch_size)
+    rebuild_search_index()
+    versions.bump(versions.INGREDIENTS)
+    versions.bump(versions.RECIPES)
@@ -0,0 +1,269 @@
+from concurrent.futures import ThreadPoolExecutor
+import base64
+import io
+import json
+import random
+import statistics
+import threading
+import time
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from PIL import Image
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+import requests
+
+from recipes.models import Ingredient, Recipe
+from recipes.shortlinks import encode
+
+User = get_user_model()
+
+PERCENTILES = (50, 90, 99)
+
+
+def make_image():
+    buffer = io.BytesIO()
+    Image.new('RGB', (64, 64), (200, 120, 60)).save(buffer, 'PNG')
+    return (
+        'data:image/png;base64,'
+        + base64.b64encode(buffer.getvalue()).decode()
+    )
+
+
+class Command(BaseCommand):
+    help = 'Замеряет задержки и число запросов к БД на основных эндпоинтах'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--iterations', type=int, default=50)
+        parser.add_argument('--email', help='Пользователь для запросов')
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--output', help='Куда сохранить результаты')
+        parser.add_argument('--compare', help='Базовые результаты (JSON)')
+        parser.add_argument(
+            '--base-url',
+            help='Адрес запущенного сервера: нагружать его, а не APIClient'
+        )
+        parser.add_argument(
+            '--concurrency',
+            type=int,
+            default=1,
+            help='Число параллельных клиентов для --base-url'
+        )
+
+    def handle(self, *args, **options):
+        self.random = random.Random(options['seed'])
+        user = self.get_user(options['email'])
+        recipe_ids = list(Recipe.objects.values_list('id', flat=True)[:1000])
+        prefixes = list(
+            Ingredient.objects.values_list('name', flat=True)[:200]
+        )
+        if not recipe_ids or not prefixes:
+            raise CommandError('База пуста, запустите generate_data')
+
+        token, _ = Token.objects.get_or_create(user=user)
+        if options['base_url']:
+            results = self.run_live(
+                options['base_url'].rstrip('/'), token.key, recipe_ids,
+                prefixes, options['iterations'], options['concurrency']
+            )
+        else:
+            results = self.run_in_process(
+                token.key, recipe_ids, prefixes, options['iterations']
+            )
+
+        for name, result in results.items():
+            self.stdout.write(
+                f'{name:24} p50={result["p50"]:.1f}ms '
+                f'p90={result["p90"]:.1f}ms p99={result["p99"]:.1f}ms '
+                + (
+                    f'rps={result["rps"]:.1f}' if 'rps' in result
+                    else f'queries={result["queries"]}'
+                )
+            )
+        if options['compare']:
+            self.compare(results, options['compare'])
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as file:
+                json.dump(results, file, indent=2, sort_keys=True)
+        self.stdout.write(self.style.SUCCESS('Successfully ended'))
+
+    def run_in_process(self, token, recipe_ids, prefixes, iterations):
+        host = settings.ALLOWED_HOSTS[0].lstrip('.').replace('*', 'localhost')
+        client = APIClient(HTTP_HOST=host)
+        client.credentials(HTTP_AUTHORIZATION=f'Token {token}')
+        anonymous = APIClient(HTTP_HOST=host)
+        image = make_image()
+        ingredient_ids = list(
+            Ingredient.objects.values_list('id', flat=True)[:50]
+        )
+
+        def recipe_payload():
+            return {
+                'name': 'Тестовый рецепт',
+                'text': 'Описание',
+                'cooking_time': self.random.randint(5, 60),
+                'image': image,
+                'ingredients': [
+                    {'id': ingredient_id, 'amount': 10}
+                    for ingredient_id in self.random.sample(ingredient_ids, 5)
+                ],
+            }
+
+        created_ids = []
+
+        def create_recipe():
+            response = client.post(
+                '/api/recipes/', recipe_payload(), format='json'
+            )
+            created_ids.append(response.json()['id'])
+            return response
+
+        scenarios = {
+            'recipes_list': lambda: client.get('/api/recipes/?limit=20'),
+            'recipes_list_anonymous': lambda: anonymous.get(
+                f'/api/recipes/?page={self.random.randint(1, 5)}'
+            ),
+            'recipe_detail': lambda: client.get(
+                f'/api/recipes/{self.random.choice(recipe_ids)}/'
+            ),
+            'subscriptions': lambda: client.get(
+                '/api/users/subscriptions/?recipes_limit=3'
+            ),
+            'ingredients_search': lambda: anonymous.get(
+                '/api/ingredients/',
+                {'name': self.random.choice(prefixes)[:2]}
+            ),
+            'download_shopping_cart': lambda: client.get(
+                '/api/recipes/download_shopping_cart/'
+            ),
+            'recipe_create': create_recipe,
+            'recipe_update': lambda: client.patch(
+                f'/api/recipes/{self.random.choice(created_ids)}/',
+                recipe_payload(),
+                format='json'
+            ),
+        }
+        try:
+            return {
+                name: self.measure(scenario, iterations)
+                for name, scenario in scenarios.items()
+            }
+        finally:
+            for recipe in Recipe.objects.filter(id__in=created_ids):
+                recipe.delete()
+
+    def run_live(self, base_url, token, recipe_ids, prefixes, iterations,
+                 concurrency):
+        auth = {'Authorization': f'Token {token}'}
+        scenarios = {
+            'recipes_list': lambda: (
+                '/api/recipes/?limit=20', auth
+            ),
+            'recipes_list_anonymous': lambda: (
+                f'/api/recipes/?page={self.random.randint(1, 5)}', {}
+            ),
+            'recipe_detail': lambda: (
+                f'/api/recipes/{self.random.choice(recipe_ids)}/', auth
+            ),
+            'recipes_feed': lambda: ('/api/recipes/feed/', auth),
+            'ingredients_search': lambda: (
+                f'/api/ingredients/?name={self.random.choice(prefixes)[:2]}',
+                {}
+            ),
+            'short_link': lambda: (
+                f'/s/{encode(self.random.choice(recipe_ids))}/', {}
+            ),
+        }
+        return {
+            name: self.measure_live(
+                base_url,
+                [scenario() for _ in range(iterations)],
+                concurrency
+            )
+            for name, scenario in scenarios.items()
+        }
+
+    def get_user(self, email):
+        if email:
+            return User.objects.get(email=email)
+        user = User.objects.order_by('-subscriptions_count').first()
+        if user is None:
+            raise CommandError('База пуста, запустите generate_data')
+        return user
+
+    def measure(self, scenario, iterations):
+        timings, queries = [], []
+        for _ in range(iterations):
+            with CaptureQueriesContext(connection) as context:
+                started = time.perf_counter()
+                response = scenario()
+                if response.streaming:
+                    b''.join(response.streaming_content)
+                timings.append((time.perf_counter() - started) * 1000)
+            if response.status_code >= 400:
+                raise CommandError(
+                    f'{response.status_code}: {response.content[:200]}'
+                )
+            queries.append(len(context))
+        cut_points = statistics.quantiles(timings, n=100, method='inclusive')
+        result = {
+            f'p{percentile}': cut_points[percentile - 1]
+            for percentile in PERCENTILES
+        }
+        result['mean'] = statistics.fmean(timings)
+        result['queries'] = max(queries)
+        return result
+
+    def measure_live(self, base_url, requests_to_send, concurrency):
+        local = threading.local()
+
+        def send(request):
+            path, headers = request
+            if not hasattr(local, 'session'):
+                local.session = requests.Session()
+            started = time.perf_counter()
+            response = local.session.get(
+                base_url + path, headers=headers, allow_redirects=False
+            )
+            elapsed = (time.perf_counter() - started) * 1000
+            if response.status_code >= 400:
+                raise CommandError(
+                    f'{response.status_code}: {response.content[:200]}'
+                )
+            return elapsed
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(concurrency) as executor:
+            timings = list(executor.map(send, requests_to_send))
+        wall_time = time.perf_counter() - started
+        cut_points = statistics.quantiles(timings, n=100, method='inclusive')
+        result = {
+            f'p{percentile}': cut_points[percentile - 1]
+            for percentile in PERCENTILES
+        }
+        result['mean'] = statistics.fmean(timings)
+        result['rps'] = len(timings) / wall_time
+        return result
+
+    def compare(self, results, path):
+        with open(path, encoding='utf-8') as file:
+            baseline = json.load(file)
+        for name, result in results.items():
+            if name not in baseline:
+                continue
+            before = baseline[name]
+            line = (
+                f'{name:24} p50 {before["p50"]:.1f} -> {result["p50"]:.1f}ms '
+                f'({result["p50"] / before["p50"] - 1:+.0%})'
+            )
+            if 'rps' in result and 'rps' in before:
+                line += f', rps {before["rps"]:.1f} -> {result["rps"]:.1f}'
+            elif 'queries' in result and 'queries' in before:
+                line += (
+                    f', queries {before["queries"]} -> {result["queries"]}'
+                )
+            self.stdout.write(line)
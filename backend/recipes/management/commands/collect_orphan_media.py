@@ -0,0 +1,88 @@
+import os
+import time
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+
+from api.services.images import (
+    AVATAR_VARIANTS,
+    RECIPE_IMAGE_VARIANTS,
+    variant_name
+)
+from recipes.models import Recipe
+
+User = get_user_model()
+
+
+def iter_files(path):
+    with os.scandir(path) as entries:
+        for entry in entries:
+            if entry.is_dir(follow_symlinks=False):
+                yield from iter_files(entry.path)
+            elif entry.is_file(follow_symlinks=False):
+                yield entry
+
+
+class Command(BaseCommand):
+    help = 'Удаляет файлы из MEDIA_ROOT, на которые не ссылается база'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500)
+        parser.add_argument(
+            '--min-age',
+            type=int,
+            default=60 * 60,
+            help='Не трогать файлы моложе указанного числа секунд'
+        )
+        parser.add_argument('--dry-run', action='store_true')
+
+    def get_referenced_paths(self):
+        referenced = set()
+        sources = (
+            (Recipe.objects.exclude(image=''), 'image', RECIPE_IMAGE_VARIANTS),
+            (User.objects.exclude(avatar=''), 'avatar', AVATAR_VARIANTS),
+        )
+        for queryset, field, variants in sources:
+            for name in queryset.values_list(field, flat=True).iterator():
+                referenced.add(os.path.normpath(name))
+                referenced.update(
+                    os.path.normpath(variant_name(name, variant))
+                    for variant in variants
+                )
+        return referenced
+
+    def handle(self, *args, **options):
+        media_root = settings.MEDIA_ROOT
+        if not os.path.isdir(media_root):
+            self.stdout.write(f'{media_root} не существует')
+            return
+        referenced = self.get_referenced_paths()
+        deadline = time.time() - options['min_age']
+        batch = []
+        removed = reclaimed = 0
+        for entry in iter_files(media_root):
+            name = os.path.relpath(entry.path, media_root)
+            stat = entry.stat(follow_symlinks=False)
+            if name in referenced or stat.st_mtime > deadline:
+                continue
+            batch.append(entry.path)
+            removed += 1
+            reclaimed += stat.st_size
+            if len(batch) >= options['batch_size']:
+                self.remove(batch, options['dry_run'])
+                batch = []
+        self.remove(batch, options['dry_run'])
+        self.stdout.write(self.style.SUCCESS(
+            f'Successfully ended: {removed} files, {reclaimed} bytes '
+            f'{"can be" if options["dry_run"] else "were"} reclaimed'
+        ))
+
+    def remove(self, paths, dry_run):
+        if dry_run:
+            return
+        for path in paths:
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
@@ -0,0 +1,129 @@
+import re
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from recipes.models import (
+    FavoriteRecipe,
+    Ingredient,
+    Recipe,
+    ShoppingCart,
+    ShoppingListItem
+)
+from recipes.search import search_recipes
+from users.models import UserSubscription
+
+INDEX_MARKERS = {
+    'postgresql': ('Index Scan', 'Index Only Scan', 'Bitmap Index Scan'),
+    'sqlite': (
+        'USING INDEX', 'USING COVERING INDEX',
+        'USING INTEGER PRIMARY KEY', 'VIRTUAL TABLE INDEX',
+    ),
+}
+FULL_SCAN_PATTERNS = {
+    'postgresql': r'Seq Scan on {table}\b',
+    'sqlite': r'SCAN {table}$',
+}
+HOT_QUERIES = (
+    ('recipe_page', Recipe, None, lambda sample: (
+        Recipe.objects.order_by('-pub_date', '-id')[:6]
+    )),
+    ('recipe_author_page', Recipe, None, lambda sample: (
+        Recipe.objects.filter(author_id=sample['author'])
+        .order_by('-pub_date', '-id')[:6]
+    )),
+    ('favorite_exists', FavoriteRecipe, None, lambda sample: (
+        FavoriteRecipe.objects.filter(
+            user_id=sample['user'], recipe_id=sample['recipe']
+        )
+    )),
+    ('cart_exists', ShoppingCart, None, lambda sample: (
+        ShoppingCart.objects.filter(
+            user_id=sample['user'], recipe_id=sample['recipe']
+        )
+    )),
+    ('cart_holders', ShoppingCart, None, lambda sample: (
+        ShoppingCart.objects.filter(recipe_id=sample['recipe'])
+        .values_list('user_id', flat=True)
+    )),
+    ('author_subscribers', UserSubscription, None, lambda sample: (
+        UserSubscription.objects.filter(author_id=sample['author'])
+        .values_list('user_id', flat=True)
+    )),
+    ('shopping_list_cleanup', ShoppingListItem, None, lambda sample: (
+        ShoppingListItem.objects.filter(
+            user_id__in=[sample['user']], total_amount__lte=0
+        )
+    )),
+    ('ingredient_prefix', Ingredient, ('postgresql',), lambda sample: (
+        Ingredient.objects.filter(name__istartswith=sample['prefix'])
+    )),
+    ('recipe_search', Recipe, None, lambda sample: (
+        search_recipes(Recipe.objects.all(), sample['prefix'])
+    )),
+)
+
+
+class Command(BaseCommand):
+    help = (
+        'Проверяет через EXPLAIN, что частые запросы используют индексы. '
+        'Запускайте на наполненной базе (generate_data)'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--analyze',
+            action='store_true',
+            help='Обновить статистику планировщика перед проверкой'
+        )
+
+    def get_sample(self):
+        recipe = Recipe.objects.values('id', 'author_id', 'name').first()
+        user_id = FavoriteRecipe.objects.values_list(
+            'user_id', flat=True
+        ).first()
+        if recipe is None or user_id is None:
+            raise CommandError(
+                'База пуста: сначала выполните generate_data'
+            )
+        return {
+            'recipe': recipe['id'],
+            'author': recipe['author_id'],
+            'user': user_id,
+            'prefix': recipe['name'][:3],
+        }
+
+    def handle(self, *args, **options):
+        vendor = connection.vendor
+        if vendor not in INDEX_MARKERS:
+            raise CommandError(f'EXPLAIN для {vendor} не поддерживается')
+        if options['analyze']:
+            with connection.cursor() as cursor:
+                cursor.execute('ANALYZE')
+        sample = self.get_sample()
+        failed = []
+        for name, model, vendors, build in HOT_QUERIES:
+            if vendors and vendor not in vendors:
+                continue
+            plan = build(sample).explain()
+            full_scan = re.search(
+                FULL_SCAN_PATTERNS[vendor].format(
+                    table=re.escape(model._meta.db_table)
+                ),
+                plan,
+                re.MULTILINE
+            )
+            uses_index = any(
+                marker in plan for marker in INDEX_MARKERS[vendor]
+            )
+            ok = uses_index and not full_scan
+            if not ok:
+                failed.append(name)
+            self.stdout.write(f'{name}: {"index" if ok else "FULL SCAN"}')
+            if options['verbosity'] > 1 or not ok:
+                self.stdout.write(plan)
+        if failed:
+            raise CommandError(
+                f'Запросы без индекса: {", ".join(failed)}'
+            )
+        self.stdout.write(self.style.SUCCESS('Successfully ended'))
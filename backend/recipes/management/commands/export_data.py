@@ -0,0 +1,53 @@
+import os
+import time
+
+from django.core.management.base import BaseCommand
+
+from recipes.data_transfer import ENTITIES, FORMATS, write_rows
+
+
+class Command(BaseCommand):
+    help = 'Выгружает данные в файлы JSON Lines или CSV'
+
+    def add_arguments(self, parser):
+        parser.add_argument('directory')
+        parser.add_argument('--format', choices=FORMATS, default='jsonl')
+        parser.add_argument(
+            '--entities', nargs='+', choices=ENTITIES, default=list(ENTITIES)
+        )
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument(
+            '--header',
+            action='store_true',
+            help='Добавить строку заголовков в CSV-файлы'
+        )
+
+    def handle(self, *args, **options):
+        os.makedirs(options['directory'], exist_ok=True)
+        for name, entity in ENTITIES.items():
+            if name not in options['entities']:
+                continue
+            path = os.path.join(
+                options['directory'], f'{name}.{options["format"]}'
+            )
+            started = time.monotonic()
+            total = 0
+            with open(path, 'w', encoding='utf-8', newline='') as file:
+                rows = entity.export_rows().iterator(
+                    chunk_size=options['batch_size']
+                )
+                for _ in write_rows(
+                    file, options['format'], entity.fields, rows,
+                    options['header']
+                ):
+                    total += 1
+                    if total % options['batch_size'] == 0:
+                        self.report(name, total, started)
+            self.report(name, total, started)
+        self.stdout.write(self.style.SUCCESS('Successfully ended'))
+
+    def report(self, name, total, started):
+        elapsed = max(time.monotonic() - started, 1e-6)
+        self.stdout.write(
+            f'{name}: {total} rows, {total / elapsed:.0f} rows/s'
+        )
@@ -0,0 +1,171 @@
+from itertools import accumulate
+import io
+import random
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from PIL import Image
+
+from api.services.images import RECIPE_IMAGE_VARIANTS, generate_variants
+from recipes.data_transfer import refresh_derived_data
+from recipes.models import (
+    FavoriteRecipe,
+    Ingredient,
+    Recipe,
+    RecipeIngredient,
+    ShoppingCart
+)
+from users.models import UserSubscription
+
+User = get_user_model()
+
+PLACEHOLDER_IMAGE = 'recipes/images/generated.png'
+WORDS = (
+    'суп', 'салат', 'пирог', 'омлет', 'рагу', 'плов', 'каша', 'паста',
+    'острый', 'домашний', 'быстрый', 'летний', 'сырный', 'овощной',
+)
+
+
+class Command(BaseCommand):
+    help = 'Наполняет базу синтетическими данными для нагрузочных тестов'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=100)
+        parser.add_argument('--recipes', type=int, default=1000)
+        parser.add_argument('--ingredients-per-recipe', type=int, default=8)
+        parser.add_argument('--favorites-per-user', type=int, default=20)
+        parser.add_argument('--carts-per-user', type=int, default=5)
+        parser.add_argument('--subscriptions-per-user', type=int, default=10)
+        parser.add_argument(
+            '--zipf',
+            type=float,
+            default=1.1,
+            help='Показатель распределения Ципфа для популярности продуктов'
+        )
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        self.random = random.Random(options['seed'])
+        self.batch_size = options['batch_size']
+        ingredient_ids = list(Ingredient.objects.values_list('id', flat=True))
+        if not ingredient_ids:
+            self.stdout.write(self.style.ERROR(
+                'Сначала импортируйте продукты: import_data ../data '
+                '--format csv --entities ingredients'
+            ))
+            return
+        self.ensure_placeholder_image()
+        user_ids = self.create_users(options['users'])
+        recipe_ids = self.create_recipes(
+            options['recipes'], user_ids, ingredient_ids,
+            options['ingredients_per_recipe'], options['zipf']
+        )
+        self.create_user_recipe_links(
+            FavoriteRecipe, user_ids, recipe_ids,
+            options['favorites_per_user']
+        )
+        self.create_user_recipe_links(
+            ShoppingCart, user_ids, recipe_ids, options['carts_per_user']
+        )
+        self.create_subscriptions(
+            user_ids, options['subscriptions_per_user']
+        )
+        refresh_derived_data(self.batch_size)
+        self.stdout.write(self.style.SUCCESS('Successfully ended'))
+
+    def ensure_placeholder_image(self):
+        if not default_storage.exists(PLACEHOLDER_IMAGE):
+            buffer = io.BytesIO()
+            Image.new('RGB', (600, 400), (230, 160, 90)).save(buffer, 'PNG')
+            default_storage.save(
+                PLACEHOLDER_IMAGE, ContentFile(buffer.getvalue())
+            )
+        generate_variants(PLACEHOLDER_IMAGE, RECIPE_IMAGE_VARIANTS)
+
+    def bulk_create(self, model, objects, ignore_conflicts=True):
+        objects = list(objects)
+        with transaction.atomic():
+            created = model.objects.bulk_create(
+                objects,
+                batch_size=self.batch_size,
+                ignore_conflicts=ignore_conflicts
+            )
+        self.stdout.write(f'{model._meta.label}: {len(objects)} rows')
+        return created
+
+    def create_users(self, count):
+        password = make_password('benchmark-password')
+        prefix = f'bench{self.random.randrange(10 ** 8)}'
+        emails = [f'{prefix}-{number}@example.com' for number in range(count)]
+        self.bulk_create(User, (
+            User(
+                email=email,
+                username=email.split('@')[0],
+                first_name='Тест',
+                last_name=f'Пользователь {number}',
+                password=password,
+            )
+            for number, email in enumerate(emails)
+        ))
+        return list(
+            User.objects.filter(email__in=emails).values_list('id', flat=True)
+        )
+
+    def create_recipes(
+        self, count, user_ids, ingredient_ids, per_recipe, exponent
+    ):
+        cum_weights = list(accumulate(
+            1 / rank ** exponent for rank in range(1, len(ingredient_ids) + 1)
+        ))
+        recipe_ids = []
+        for start in range(0, count, self.batch_size):
+            recipes = self.bulk_create(Recipe, (
+                Recipe(
+                    author_id=self.random.choice(user_ids),
+                    name=' '.join(self.random.sample(WORDS, 3)).capitalize(),
+                    text=' '.join(self.random.choices(WORDS, k=40)),
+                    cooking_time=self.random.randint(5, 180),
+                    image=PLACEHOLDER_IMAGE,
+                )
+                for _ in range(min(self.batch_size, count - start))
+            ), ignore_conflicts=False)
+            recipe_ids.extend(recipe.id for recipe in recipes)
+            self.bulk_create(RecipeIngredient, (
+                RecipeIngredient(
+                    recipe_id=recipe.id,
+                    ingredient_id=ingredient_id,
+                    amount=self.random.randint(1, 500),
+                )
+                for recipe in recipes
+                for ingredient_id in set(self.random.choices(
+                    ingredient_ids, cum_weights=cum_weights, k=per_recipe
+                ))
+            ))
+        return recipe_ids
+
+    def create_user_recipe_links(self, model, user_ids, recipe_ids, per_user):
+        per_user = min(per_user, len(recipe_ids))
+        self.bulk_create(model, (
+            model(user_id=user_id, recipe_id=recipe_id)
+            for user_id in user_ids
+            for recipe_id in self.random.sample(recipe_ids, per_user)
+        ))
+
+    def create_subscriptions(self, user_ids, per_user):
+        per_user = min(per_user, len(user_ids) - 1)
+        # Индексы других пользователей: сдвиг на 1 пропускает самого себя.
+        self.bulk_create(UserSubscription, (
+            UserSubscription(
+                user_id=user_id,
+                author_id=user_ids[other + (other >= index)]
+            )
+            for index, user_id in enumerate(user_ids)
+            for other in self.random.sample(
+                range(len(user_ids) - 1), per_user
+            )
+        ))
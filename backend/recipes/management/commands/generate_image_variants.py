@@ -0,0 +1,32 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+
+from api.services.images import (
+    AVATAR_VARIANTS,
+    RECIPE_IMAGE_VARIANTS,
+    generate_variants
+)
+from recipes.models import Recipe
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = 'Создаёт уменьшенные копии изображений рецептов и аватаров'
+
+    def handle(self, *args, **options):
+        sources = (
+            (Recipe.objects.exclude(image=''), 'image', RECIPE_IMAGE_VARIANTS),
+            (User.objects.exclude(avatar=''), 'avatar', AVATAR_VARIANTS),
+        )
+        processed = 0
+        for queryset, field, variants in sources:
+            for name in queryset.values_list(field, flat=True).iterator():
+                try:
+                    generate_variants(name, variants)
+                    processed += 1
+                except Exception as e:
+                    self.stdout.write(self.style.ERROR(f'{name}: {e}'))
+        self.stdout.write(
+            self.style.SUCCESS(f'Successfully ended: {processed} images')
+        )
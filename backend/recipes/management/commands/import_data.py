@@ -0,0 +1,71 @@
+from itertools import islice
+import os
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from recipes.data_transfer import (
+    ENTITIES,
+    FORMATS,
+    make_keys,
+    read_rows,
+    refresh_derived_data
+)
+
+
+class Command(BaseCommand):
+    help = 'Импортирует данные из файлов JSON Lines или CSV в каталоге'
+
+    def add_arguments(self, parser):
+        parser.add_argument('directory')
+        parser.add_argument('--format', choices=FORMATS, default='jsonl')
+        parser.add_argument(
+            '--entities', nargs='+', choices=ENTITIES, default=list(ENTITIES)
+        )
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument(
+            '--header',
+            action='store_true',
+            help='CSV-файлы начинаются со строки заголовков'
+        )
+
+    def handle(self, *args, **options):
+        keys = make_keys()
+        for name, entity in ENTITIES.items():
+            if name not in options['entities']:
+                continue
+            path = os.path.join(
+                options['directory'], f'{name}.{options["format"]}'
+            )
+            if not os.path.exists(path):
+                self.stdout.write(f'{name}: {path} не найден, пропускаем')
+                continue
+            self.import_entity(name, entity, path, keys, options)
+        refresh_derived_data(options['batch_size'])
+        self.stdout.write(self.style.SUCCESS('Successfully ended'))
+
+    def import_entity(self, name, entity, path, keys, options):
+        rows = read_rows(
+            path, options['format'], entity.fields, options['header']
+        )
+        started = time.monotonic()
+        total = skipped = 0
+        while batch := list(islice(rows, options['batch_size'])):
+            entity.prepare(batch, keys)
+            objects = [
+                obj for obj in (entity.build(row, keys) for row in batch)
+                if obj is not None
+            ]
+            with transaction.atomic():
+                entity.model.objects.bulk_create(
+                    objects, ignore_conflicts=entity.ignore_conflicts
+                )
+                entity.remember(batch, objects, keys)
+            total += len(batch)
+            skipped += len(batch) - len(objects)
+            elapsed = max(time.monotonic() - started, 1e-6)
+            self.stdout.write(
+                f'{name}: {total} rows, {skipped} skipped, '
+                f'{total / elapsed:.0f} rows/s'
+            )
@@ -2,6 +2,7 @@ import json
 
 from django.core.management.base import BaseCommand
 
+from api.services import versions
 from recipes.models import Ingredient
 
 
@@ -14,6 +15,7 @@ class Command(BaseCommand):
                     (Ingredient(**row) for row in json.load(file)),
                     ignore_conflicts=True
                 )
+                versions.bump(versions.INGREDIENTS)
                 self.stdout.write(
                     self.style.SUCCESS(
                         f'Successfully ended: {len(created_objects)}'
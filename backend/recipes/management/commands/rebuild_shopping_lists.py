@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+
+from recipes.models import ShoppingListItem
+
+
+class Command(BaseCommand):
+    help = 'Пересчитывает сохранённые списки покупок по корзинам'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500)
+
+    def handle(self, *args, **options):
+        rebuilt = ShoppingListItem.objects.rebuild_all(options['batch_size'])
+        self.stdout.write(f'{rebuilt} shopping lists rebuilt')
+        self.stdout.write(self.style.SUCCESS('Successfully ended'))
@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+
+from recipes.counters import COUNTERS, reconcile
+
+
+class Command(BaseCommand):
+    help = 'Пересчитывает сохранённые счётчики рецептов и пользователей'
+
+    def handle(self, *args, **options):
+        for model, field, related_model, related_field in COUNTERS:
+            fixed = reconcile(model, field, related_model, related_field)
+            self.stdout.write(
+                f'{model._meta.label}.{field}: {fixed} rows fixed'
+            )
+        self.stdout.write(self.style.SUCCESS('Successfully ended'))
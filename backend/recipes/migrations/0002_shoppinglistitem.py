@@ -0,0 +1,54 @@
+# Generated by Django 5.1.6 on 2026-10-18 16:44
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def fill_shopping_lists(apps, schema_editor):
+    RecipeIngredient = apps.get_model('recipes', 'RecipeIngredient')
+    ShoppingListItem = apps.get_model('recipes', 'ShoppingListItem')
+    totals = (
+        RecipeIngredient.objects
+        .filter(recipe__shoppingcart_by_users__isnull=False)
+        .values_list('recipe__shoppingcart_by_users__user', 'ingredient')
+        .annotate(total_amount=models.Sum('amount'))
+        .order_by()
+    )
+    ShoppingListItem.objects.bulk_create(
+        ShoppingListItem(
+            user_id=user_id,
+            ingredient_id=ingredient_id,
+            total_amount=total_amount
+        )
+        for user_id, ingredient_id, total_amount in totals
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ShoppingListItem',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('total_amount', models.IntegerField(verbose_name='Общее количество')),
+                ('ingredient', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='shopping_list_items', to='recipes.ingredient', verbose_name='Продукт')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='shopping_list_items', to=settings.AUTH_USER_MODEL, verbose_name='Пользователь')),
+            ],
+            options={
+                'verbose_name': 'Продукт списка покупок',
+                'verbose_name_plural': 'Продукты списка покупок',
+                'ordering': ('ingredient__name',),
+                'constraints': [models.UniqueConstraint(fields=('user', 'ingredient'), name='unique_shopping_list_item')],
+            },
+        ),
+        migrations.RunPython(
+            fill_shopping_lists, migrations.RunPython.noop
+        ),
+    ]
@@ -0,0 +1,64 @@
+# Generated by Django 5.1.6 on 2026-10-18 16:50
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+COUNTERS = (
+    ('users', 'User', 'recipes_count', 'recipes', 'Recipe', 'author'),
+    ('users', 'User', 'subscriptions_count',
+     'users', 'UserSubscription', 'user'),
+    ('users', 'User', 'subscribers_count',
+     'users', 'UserSubscription', 'author'),
+    ('recipes', 'Recipe', 'favorites_count',
+     'recipes', 'FavoriteRecipe', 'recipe'),
+    ('recipes', 'Recipe', 'in_carts_count',
+     'recipes', 'ShoppingCart', 'recipe'),
+    ('recipes', 'Ingredient', 'recipes_count',
+     'recipes', 'RecipeIngredient', 'ingredient'),
+)
+
+
+def fill_counters(apps, schema_editor):
+    for app, model, field, related_app, related_model, related_field in (
+        COUNTERS
+    ):
+        related = apps.get_model(related_app, related_model)
+        apps.get_model(app, model).objects.update(**{field: Coalesce(
+            Subquery(
+                related.objects
+                .filter(**{related_field: OuterRef('pk')})
+                .order_by()
+                .values(related_field)
+                .annotate(total=Count('pk'))
+                .values('total')
+            ),
+            0
+        )})
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0003_recipe_pub_date_id_idx'),
+        ('users', '0002_counters'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='ingredient',
+            name='recipes_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Число рецептов'),
+        ),
+        migrations.AddField(
+            model_name='recipe',
+            name='favorites_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='В избранном'),
+        ),
+        migrations.AddField(
+            model_name='recipe',
+            name='in_carts_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='В списках покупок'),
+        ),
+        migrations.RunPython(fill_counters, migrations.RunPython.noop),
+    ]
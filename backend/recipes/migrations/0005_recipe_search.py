@@ -0,0 +1,72 @@
+# Generated by Django 5.1.6 on 2026-10-18 17:04
+
+import django.contrib.postgres.search
+from django.db import migrations
+
+POSTGRES_FILL_SQL = """
+    UPDATE recipes_recipe AS recipe SET search_vector =
+        setweight(to_tsvector('simple', recipe.name), 'A')
+        || setweight(to_tsvector('simple', author.username), 'B')
+        || setweight(to_tsvector('simple', coalesce((
+            SELECT string_agg(ingredient.name, ' ')
+            FROM recipes_recipeingredient AS recipe_ingredient
+            JOIN recipes_ingredient AS ingredient
+                ON ingredient.id = recipe_ingredient.ingredient_id
+            WHERE recipe_ingredient.recipe_id = recipe.id
+        ), '')), 'B')
+        || setweight(to_tsvector('simple', recipe.text), 'C')
+    FROM users_user AS author
+    WHERE author.id = recipe.author_id
+"""
+SQLITE_FILL_SQL = """
+    INSERT INTO recipes_recipe_fts (rowid, name, author, ingredients, text)
+    SELECT recipe.id, recipe.name, author.username, coalesce((
+        SELECT group_concat(ingredient.name, ' ')
+        FROM recipes_recipeingredient AS recipe_ingredient
+        JOIN recipes_ingredient AS ingredient
+            ON ingredient.id = recipe_ingredient.ingredient_id
+        WHERE recipe_ingredient.recipe_id = recipe.id
+    ), ''), recipe.text
+    FROM recipes_recipe AS recipe
+    JOIN users_user AS author ON author.id = recipe.author_id
+"""
+
+
+def create_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'postgresql':
+        schema_editor.execute(
+            'CREATE INDEX recipe_search_vector_idx '
+            'ON recipes_recipe USING gin (search_vector)'
+        )
+        schema_editor.execute(POSTGRES_FILL_SQL)
+    elif vendor == 'sqlite':
+        schema_editor.execute(
+            'CREATE VIRTUAL TABLE recipes_recipe_fts '
+            'USING fts5(name, author, ingredients, text)'
+        )
+        schema_editor.execute(SQLITE_FILL_SQL)
+
+
+def drop_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'postgresql':
+        schema_editor.execute('DROP INDEX recipe_search_vector_idx')
+    elif vendor == 'sqlite':
+        schema_editor.execute('DROP TABLE recipes_recipe_fts')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0004_counters'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='recipe',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
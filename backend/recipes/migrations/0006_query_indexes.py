@@ -0,0 +1,47 @@
+# Generated by Django 5.1.6 on 2026-10-18 17:06
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+def create_ingredient_name_index(apps, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute(
+            'CREATE INDEX ingredient_upper_name_idx '
+            'ON recipes_ingredient (UPPER(name) text_pattern_ops)'
+        )
+
+
+def drop_ingredient_name_index(apps, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute('DROP INDEX ingredient_upper_name_idx')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0005_recipe_search'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='favoriterecipe',
+            index=models.Index(fields=['recipe', 'user'], name='favoriterecipe_recipe_user_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='recipe',
+            index=models.Index(fields=['author', '-pub_date', '-id'], name='recipe_author_pub_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='shoppingcart',
+            index=models.Index(fields=['recipe', 'user'], name='shoppingcart_recipe_user_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='shoppinglistitem',
+            index=models.Index(condition=models.Q(('total_amount__lte', 0)), fields=['user'], name='shopping_list_item_empty_idx'),
+        ),
+        migrations.RunPython(
+            create_ingredient_name_index, drop_ingredient_name_index
+        ),
+    ]
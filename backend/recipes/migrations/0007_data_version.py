@@ -0,0 +1,25 @@
+# Generated by Django 5.1.6 on 2026-10-18 17:27
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0006_query_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DataVersion',
+            fields=[
+                ('key', models.CharField(max_length=64, primary_key=True, serialize=False, verbose_name='Ключ')),
+                ('tag', models.CharField(max_length=32, verbose_name='Версия')),
+                ('modified', models.FloatField(verbose_name='Время изменения')),
+            ],
+            options={
+                'verbose_name': 'Версия данных',
+                'verbose_name_plural': 'Версии данных',
+            },
+        ),
+    ]
@@ -1,11 +1,14 @@
 from django.contrib.auth import get_user_model
+from django.contrib.postgres.search import SearchVectorField
 from django.core.validators import MinValueValidator, MaxValueValidator
-from django.db import models
+from django.db import models, transaction
+
+from users.models import CounterFieldsMixin
 
 User = get_user_model()
 
 
-class Ingredient(models.Model):
+class Ingredient(CounterFieldsMixin, models.Model):
     name = models.CharField(
         'Название',
         unique=True,
@@ -15,6 +18,13 @@ class Ingredient(models.Model):
         'Единица измерения',
         max_length=64,
     )
+    recipes_count = models.PositiveIntegerField(
+        'Число рецептов',
+        default=0,
+        editable=False,
+    )
+
+    counter_fields = ('recipes_count',)
 
     class Meta:
         ordering = ('name',)
@@ -25,7 +35,7 @@ class Ingredient(models.Model):
         return f'{self.name}, {self.measurement_unit}.'
 
 
-class Recipe(models.Model):
+class Recipe(CounterFieldsMixin, models.Model):
     name = models.CharField(
         max_length=256,
         verbose_name='Название',
@@ -56,15 +66,37 @@ class Recipe(models.Model):
         upload_to='recipes/images/',
         verbose_name='Изображение',
     )
+    favorites_count = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name='В избранном',
+    )
+    in_carts_count = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name='В списках покупок',
+    )
+    search_vector = SearchVectorField(
+        null=True,
+        editable=False,
+    )
 
-    def delete(self, *args, **kwargs):
-        if self.image:
-            self.image.delete(save=False)
-        super().delete(*args, **kwargs)
+    counter_fields = ('favorites_count', 'in_carts_count')
+    derived_fields = ('search_vector',)
 
     class Meta:
         default_related_name = 'recipes'
         ordering = ['-pub_date']
+        indexes = [
+            models.Index(
+                fields=['-pub_date', '-id'],
+                name='recipe_pub_date_id_idx'
+            ),
+            models.Index(
+                fields=['author', '-pub_date', '-id'],
+                name='recipe_author_pub_date_idx'
+            ),
+        ]
         verbose_name = 'Рецепт'
         verbose_name_plural = 'Рецепты'
 
@@ -130,6 +162,12 @@ class BaseUserRecipeRelation(models.Model):
                 name='%(class)s_unique_user_recipe',
             ),
         ]
+        indexes = [
+            models.Index(
+                fields=['recipe', 'user'],
+                name='%(class)s_recipe_user_idx'
+            ),
+        ]
         ordering = ('-id',)
 
     def __str__(self):
@@ -146,3 +184,143 @@ class ShoppingCart(BaseUserRecipeRelation):
     class Meta(BaseUserRecipeRelation.Meta):
         verbose_name = 'Список покупок'
         verbose_name_plural = 'Списки покупок'
+
+
+class ShoppingListItemQuerySet(models.QuerySet):
+    def apply_deltas(self, user_ids, deltas):
+        deltas = {
+            ingredient_id: delta
+            for ingredient_id, delta in deltas.items() if delta
+        }
+        if not deltas:
+            return
+        user_ids = list(user_ids)
+        if not user_ids:
+            return
+        with transaction.atomic():
+            self.bulk_create(
+                (
+                    self.model(
+                        user_id=user_id,
+                        ingredient_id=ingredient_id,
+                        total_amount=0
+                    )
+                    for user_id in user_ids
+                    for ingredient_id in deltas
+                ),
+                ignore_conflicts=True
+            )
+            self.filter(
+                user_id__in=user_ids, ingredient_id__in=deltas
+            ).update(total_amount=models.F('total_amount') + models.Case(
+                *(
+                    models.When(ingredient_id=ingredient_id, then=delta)
+                    for ingredient_id, delta in deltas.items()
+                ),
+                default=0
+            ))
+            self.filter(
+                user_id__in=user_ids, total_amount__lte=0
+            ).delete()
+
+    def add_recipe(self, recipe_id, user_ids):
+        self.apply_deltas(user_ids, dict(
+            RecipeIngredient.objects.filter(
+                recipe_id=recipe_id
+            ).values_list('ingredient_id', 'amount')
+        ))
+
+    def remove_recipe(self, recipe_id, user_ids):
+        self.apply_deltas(user_ids, {
+            ingredient_id: -amount
+            for ingredient_id, amount in
+            RecipeIngredient.objects.filter(
+                recipe_id=recipe_id
+            ).values_list('ingredient_id', 'amount')
+        })
+
+    def rebuild(self, user_ids):
+        user_ids = list(user_ids)
+        totals = (
+            RecipeIngredient.objects
+            .filter(recipe__shoppingcart_by_users__user_id__in=user_ids)
+            .values_list('recipe__shoppingcart_by_users__user', 'ingredient')
+            .annotate(total_amount=models.Sum('amount'))
+            .order_by()
+        )
+        with transaction.atomic():
+            self.filter(user_id__in=user_ids).delete()
+            self.bulk_create(
+                self.model(
+                    user_id=user_id,
+                    ingredient_id=ingredient_id,
+                    total_amount=total_amount
+                )
+                for user_id, ingredient_id, total_amount in totals
+            )
+
+    def rebuild_all(self, batch_size):
+        user_ids = list(
+            ShoppingCart.objects.values_list('user_id', flat=True)
+            .order_by()
+            .union(self.values_list('user_id', flat=True).order_by())
+        )
+        for start in range(0, len(user_ids), batch_size):
+            self.rebuild(user_ids[start:start + batch_size])
+        return len(user_ids)
+
+
+class ShoppingListItem(models.Model):
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='shopping_list_items',
+        verbose_name='Пользователь',
+    )
+    ingredient = models.ForeignKey(
+        Ingredient,
+        on_delete=models.CASCADE,
+        related_name='shopping_list_items',
+        verbose_name='Продукт',
+    )
+    total_amount = models.IntegerField(verbose_name='Общее количество')
+
+    objects = ShoppingListItemQuerySet.as_manager()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'ingredient'],
+                name='unique_shopping_list_item',
+            ),
+        ]
+        indexes = [
+            models.Index(
+                fields=['user'],
+                condition=models.Q(total_amount__lte=0),
+                name='shopping_list_item_empty_idx'
+            ),
+        ]
+        ordering = ('ingredient__name',)
+        verbose_name = 'Продукт списка покупок'
+        verbose_name_plural = 'Продукты списка покупок'
+
+    def __str__(self):
+        return f'{self.user} — {self.ingredient} — {self.total_amount}'
+
+
+class DataVersion(models.Model):
+    key = models.CharField(
+        'Ключ',
+        primary_key=True,
+        max_length=64,
+    )
+    tag = models.CharField('Версия', max_length=32)
+    modified = models.FloatField('Время изменения')
+
+    class Meta:
+        verbose_name = 'Версия данных'
+        verbose_name_plural = 'Версии данных'
+
+    def __str__(self):
+        return f'{self.key}: {self.tag}'
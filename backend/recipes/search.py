@@ -0,0 +1,149 @@
+import re
+
+from django.contrib.postgres.search import SearchQuery, SearchRank
+from django.db import connection
+from django.db.models import BooleanField, Exists, F, FloatField, Q
+from django.db.models.expressions import RawSQL
+
+from .models import Recipe
+
+SEARCH_CONFIG = 'simple'
+FTS_TABLE = 'recipes_recipe_fts'
+FTS_WEIGHTS = '10.0, 5.0, 5.0, 1.0'
+
+POSTGRES_UPDATE_SQL = f'''
+    UPDATE recipes_recipe AS recipe SET search_vector =
+        setweight(to_tsvector('{SEARCH_CONFIG}', recipe.name), 'A')
+        || setweight(to_tsvector('{SEARCH_CONFIG}', author.username), 'B')
+        || setweight(to_tsvector('{SEARCH_CONFIG}', coalesce((
+            SELECT string_agg(ingredient.name, ' ')
+            FROM recipes_recipeingredient AS recipe_ingredient
+            JOIN recipes_ingredient AS ingredient
+                ON ingredient.id = recipe_ingredient.ingredient_id
+            WHERE recipe_ingredient.recipe_id = recipe.id
+        ), '')), 'B')
+        || setweight(to_tsvector('{SEARCH_CONFIG}', recipe.text), 'C')
+    FROM users_user AS author
+    WHERE author.id = recipe.author_id
+'''
+SQLITE_SELECT_SQL = '''
+    SELECT recipe.id, recipe.name, author.username, coalesce((
+        SELECT group_concat(ingredient.name, ' ')
+        FROM recipes_recipeingredient AS recipe_ingredient
+        JOIN recipes_ingredient AS ingredient
+            ON ingredient.id = recipe_ingredient.ingredient_id
+        WHERE recipe_ingredient.recipe_id = recipe.id
+    ), ''), recipe.text
+    FROM recipes_recipe AS recipe
+    JOIN users_user AS author ON author.id = recipe.author_id
+'''
+
+
+def search_terms(query):
+    return re.findall(r'[^\W_]+', query.lower())
+
+
+def placeholders(values):
+    return ', '.join(['%s'] * len(values))
+
+
+def update_search_index(recipe_ids):
+    recipe_ids = list(recipe_ids)
+    if not recipe_ids:
+        return
+    with connection.cursor() as cursor:
+        if connection.vendor == 'postgresql':
+            cursor.execute(
+                POSTGRES_UPDATE_SQL + ' AND recipe.id = ANY(%s)',
+                [recipe_ids]
+            )
+        elif connection.vendor == 'sqlite':
+            cursor.execute(
+                f'DELETE FROM {FTS_TABLE} '
+                f'WHERE rowid IN ({placeholders(recipe_ids)})',
+                recipe_ids
+            )
+            cursor.execute(
+                f'INSERT INTO {FTS_TABLE} '
+                '(rowid, name, author, ingredients, text) '
+                f'{SQLITE_SELECT_SQL} '
+                f'WHERE recipe.id IN ({placeholders(recipe_ids)})',
+                recipe_ids
+            )
+
+
+def remove_from_search_index(recipe_ids):
+    recipe_ids = list(recipe_ids)
+    if recipe_ids and connection.vendor == 'sqlite':
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'DELETE FROM {FTS_TABLE} '
+                f'WHERE rowid IN ({placeholders(recipe_ids)})',
+                recipe_ids
+            )
+
+
+def rebuild_search_index():
+    with connection.cursor() as cursor:
+        if connection.vendor == 'postgresql':
+            cursor.execute(POSTGRES_UPDATE_SQL)
+        elif connection.vendor == 'sqlite':
+            cursor.execute(f'DELETE FROM {FTS_TABLE}')
+            cursor.execute(
+                f'INSERT INTO {FTS_TABLE} '
+                '(rowid, name, author, ingredients, text) '
+                f'{SQLITE_SELECT_SQL}'
+            )
+
+
+def name_contains(terms):
+    condition = Q()
+    for term in terms:
+        condition &= Q(name__icontains=term)
+    return condition
+
+
+def search_recipes(queryset, query):
+    """Ищет по началам слов, а без совпадений — подстроку в названии."""
+    terms = search_terms(query)
+    if not terms:
+        return queryset
+    if connection.vendor == 'postgresql':
+        search_query = SearchQuery(
+            ' & '.join(f'{term}:*' for term in terms),
+            search_type='raw',
+            config=SEARCH_CONFIG
+        )
+        matches = Q(search_vector=search_query)
+        return queryset.filter(
+            matches
+            | ~Exists(Recipe.objects.filter(matches)) & name_contains(terms)
+        ).annotate(
+            search_rank=SearchRank(F('search_vector'), search_query)
+        ).order_by('-search_rank', '-pub_date', '-id')
+    if connection.vendor == 'sqlite':
+        match = ' '.join(f'"{term}"*' for term in terms)
+        fts_rows = (
+            f'SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s'
+        )
+        return queryset.filter(
+            Q(pk__in=RawSQL(fts_rows, (match,)))
+            | RawSQL(
+                f'NOT EXISTS ({fts_rows})', (match,),
+                output_field=BooleanField()
+            ) & name_contains(terms)
+        ).annotate(search_rank=RawSQL(
+            f'SELECT -bm25({FTS_TABLE}, {FTS_WEIGHTS}) FROM {FTS_TABLE} '
+            f'WHERE {FTS_TABLE} MATCH %s '
+            f'AND rowid = {Recipe._meta.db_table}.id',
+            (match,),
+            output_field=FloatField()
+        )).order_by(
+            F('search_rank').desc(nulls_last=True), '-pub_date', '-id'
+        )
+    condition = Q()
+    for term in terms:
+        condition &= (
+            Q(name__icontains=term) | Q(author__username__icontains=term)
+        )
+    return queryset.filter(condition)
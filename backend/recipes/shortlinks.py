@@ -0,0 +1,66 @@
+from string import ascii_letters, digits
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+
+from .models import Recipe
+
+ALPHABET = digits + ascii_letters
+CHECK_ALPHABET = ascii_letters
+SHORT_LINK_MAX_AGE = 5 * 60
+
+
+def encode(recipe_id):
+    value, code = recipe_id, ''
+    while True:
+        value, remainder = divmod(value, len(ALPHABET))
+        code = ALPHABET[remainder] + code
+        if not value:
+            break
+    return code + CHECK_ALPHABET[recipe_id % len(CHECK_ALPHABET)]
+
+
+def decode(code):
+    if len(code) < 2:
+        raise ValueError(code)
+    recipe_id = 0
+    for char in code[:-1]:
+        recipe_id = recipe_id * len(ALPHABET) + ALPHABET.index(char)
+    if CHECK_ALPHABET[recipe_id % len(CHECK_ALPHABET)] != code[-1]:
+        raise ValueError(code)
+    return recipe_id
+
+
+def get_cache():
+    return caches[settings.SHORT_LINK_CACHE['ALIAS']]
+
+
+def make_key(recipe_id):
+    return f'short-link:{recipe_id}'
+
+
+def recipe_exists(recipe_id):
+    key = make_key(recipe_id)
+    if get_cache().get(key, False):
+        return True
+    exists = Recipe.objects.filter(id=recipe_id).exists()
+    if exists:
+        get_cache().set(key, True, settings.SHORT_LINK_CACHE['TIMEOUT'])
+    return exists
+
+
+async def arecipe_exists(recipe_id):
+    key = make_key(recipe_id)
+    if await get_cache().aget(key, False):
+        return True
+    exists = await Recipe.objects.filter(id=recipe_id).aexists()
+    if exists:
+        await get_cache().aset(
+            key, True, settings.SHORT_LINK_CACHE['TIMEOUT']
+        )
+    return exists
+
+
+def forget_recipe(recipe_id):
+    transaction.on_commit(lambda: get_cache().delete(make_key(recipe_id)))
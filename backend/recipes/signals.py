@@ -0,0 +1,112 @@
+from django.contrib.auth import get_user_model
+from django.db.models.signals import post_delete, post_save, pre_delete
+from django.dispatch import receiver
+
+from users.signals import update_counter
+
+from .models import (
+    FavoriteRecipe,
+    Ingredient,
+    Recipe,
+    RecipeIngredient,
+    ShoppingCart,
+    ShoppingListItem
+)
+from .search import remove_from_search_index, update_search_index
+from .shortlinks import forget_recipe
+
+User = get_user_model()
+
+RECIPE_RELATION_COUNTERS = {
+    FavoriteRecipe: 'favorites_count',
+    ShoppingCart: 'in_carts_count',
+}
+
+
+@receiver(post_save, sender=Recipe)
+def increment_recipes_count(instance, created, **kwargs):
+    if created:
+        update_counter(User, instance.author_id, 'recipes_count', 1)
+
+
+@receiver(post_delete, sender=Recipe)
+def decrement_recipes_count(instance, **kwargs):
+    update_counter(User, instance.author_id, 'recipes_count', -1)
+
+
+@receiver(post_delete, sender=Recipe)
+def forget_short_link(instance, **kwargs):
+    forget_recipe(instance.id)
+
+
+@receiver(post_delete, sender=Recipe)
+def remove_recipe_from_search(instance, **kwargs):
+    remove_from_search_index([instance.id])
+
+
+@receiver(post_save, sender=Ingredient)
+def reindex_ingredient_recipes(instance, created, **kwargs):
+    if not created:
+        update_search_index(
+            instance.ingredient_recipes.values_list('recipe_id', flat=True)
+        )
+
+
+@receiver(post_save, sender=User)
+def reindex_author_recipes(instance, created, update_fields, **kwargs):
+    if not created and (update_fields is None or 'username' in update_fields):
+        update_search_index(instance.recipes.values_list('id', flat=True))
+
+
+@receiver(post_save, sender=RecipeIngredient)
+def increment_ingredient_recipes_count(instance, created, **kwargs):
+    if created:
+        update_counter(Ingredient, instance.ingredient_id, 'recipes_count', 1)
+
+
+@receiver(post_delete, sender=RecipeIngredient)
+def decrement_ingredient_recipes_count(instance, **kwargs):
+    update_counter(Ingredient, instance.ingredient_id, 'recipes_count', -1)
+
+
+@receiver(post_save, sender=FavoriteRecipe)
+@receiver(post_save, sender=ShoppingCart)
+def increment_recipe_relation_count(sender, instance, created, **kwargs):
+    if created:
+        update_counter(
+            Recipe, instance.recipe_id, RECIPE_RELATION_COUNTERS[sender], 1
+        )
+
+
+@receiver(post_delete, sender=FavoriteRecipe)
+@receiver(post_delete, sender=ShoppingCart)
+def decrement_recipe_relation_count(sender, instance, **kwargs):
+    update_counter(
+        Recipe, instance.recipe_id, RECIPE_RELATION_COUNTERS[sender], -1
+    )
+
+
+@receiver(post_save, sender=ShoppingCart)
+def add_recipe_to_shopping_list(instance, created, **kwargs):
+    if created:
+        ShoppingListItem.objects.add_recipe(
+            instance.recipe_id, [instance.user_id]
+        )
+
+
+@receiver(pre_delete, sender=ShoppingCart)
+def remove_recipe_from_shopping_list(instance, origin, **kwargs):
+    if isinstance(origin, Recipe) and origin.pk == instance.recipe_id:
+        return
+    ShoppingListItem.objects.remove_recipe(
+        instance.recipe_id, [instance.user_id]
+    )
+
+
+@receiver(pre_delete, sender=Recipe)
+def remove_deleted_recipe_from_shopping_lists(instance, origin, **kwargs):
+    if origin is instance:
+        ShoppingListItem.objects.remove_recipe(
+            instance.id,
+            instance.shoppingcart_by_users.values_list('user_id', flat=True)
+        )
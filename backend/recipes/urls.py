@@ -9,4 +9,9 @@ urlpatterns = [
         views.redirect_to_recipe,
         name='redirect_to_recipe'
     ),
+    path(
+        's/<str:code>/',
+        views.redirect_short_link,
+        name='redirect_short_link'
+    ),
 ]
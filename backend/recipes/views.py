@@ -1,5 +1,42 @@
-from django.shortcuts import redirect
+from django.http import Http404, HttpResponseRedirect
+from django.utils.cache import patch_cache_control
+
+from .shortlinks import (
+    SHORT_LINK_MAX_AGE,
+    arecipe_exists,
+    decode,
+    recipe_exists
+)
+
+
+def recipe_redirect(recipe_id):
+    response = HttpResponseRedirect(f'/recipes/{recipe_id}/')
+    patch_cache_control(response, public=True, max_age=SHORT_LINK_MAX_AGE)
+    return response
+
+
+def decode_or_404(code):
+    try:
+        return decode(code)
+    except ValueError:
+        raise Http404
 
 
 def redirect_to_recipe(request, recipe_id):
-    return redirect(f'/recipes/{recipe_id}/')
+    if not recipe_exists(recipe_id):
+        raise Http404
+    return recipe_redirect(recipe_id)
+
+
+def redirect_short_link(request, code):
+    return redirect_to_recipe(request, decode_or_404(code))
+
+
+async def aredirect_to_recipe(request, recipe_id):
+    if not await arecipe_exists(recipe_id):
+        raise Http404
+    return recipe_redirect(recipe_id)
+
+
+async def aredirect_short_link(request, code):
+    return await aredirect_to_recipe(request, decode_or_404(code))
@@ -1,6 +1,5 @@
 from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin as BaseUserAdmin
-from django.db.models import Count
 from django.utils.safestring import mark_safe
 
 from .models import User, UserSubscription
@@ -15,14 +14,6 @@ class CustomUserAdmin(BaseUserAdmin):
     readonly_fields = ('avatar_img',)
     search_fields = ('username', 'first_name', 'last_name', 'email')
 
-    def get_queryset(self, request):
-        queryset = super().get_queryset(request)
-        return queryset.annotate(
-            _recipes_count=Count('recipes', distinct=True),
-            _subscriptions_count=Count('subscribers', distinct=True),
-            _subscribers_count=Count('authors', distinct=True),
-        )
-
     @admin.display(description='ФИО')
     def full_name(self, obj):
         return f'{obj.first_name} {obj.last_name}'
@@ -37,18 +28,6 @@ class CustomUserAdmin(BaseUserAdmin):
             )
         return '—'
 
-    @admin.display(description='Рецептов')
-    def recipes_count(self, obj):
-        return obj._recipes_count
-
-    @admin.display(description='Подписок')
-    def subscriptions_count(self, obj):
-        return obj._subscriptions_count
-
-    @admin.display(description='Подписчиков')
-    def subscribers_count(self, obj):
-        return obj._subscribers_count
-
 
 @admin.register(UserSubscription)
 class UserSubscriptionAdmin(admin.ModelAdmin):
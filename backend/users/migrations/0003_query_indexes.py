@@ -0,0 +1,17 @@
+# Generated by Django 5.1.6 on 2026-10-18 17:06
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0002_counters'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='usersubscription',
+            index=models.Index(fields=['author', 'user'], name='subscription_author_user_idx'),
+        ),
+    ]
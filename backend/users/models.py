@@ -9,7 +9,22 @@ EMAIL_MAX_LENGTH = 255
 NAME_MAX_LENGTH = 150
 
 
-class User(AbstractUser):
+class CounterFieldsMixin:
+    counter_fields = ()
+    derived_fields = ()
+
+    def save(self, *args, **kwargs):
+        if not self._state.adding and kwargs.get('update_fields') is None:
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key
+                and field.name not in self.counter_fields
+                and field.name not in self.derived_fields
+            ]
+        super().save(*args, **kwargs)
+
+
+class User(CounterFieldsMixin, AbstractUser):
     email = models.EmailField(
         unique=True,
         max_length=EMAIL_MAX_LENGTH,
@@ -34,6 +49,25 @@ class User(AbstractUser):
         blank=True,
         verbose_name='Аватар',
     )
+    recipes_count = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name='Рецептов',
+    )
+    subscriptions_count = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name='Подписок',
+    )
+    subscribers_count = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name='Подписчиков',
+    )
+
+    counter_fields = (
+        'recipes_count', 'subscriptions_count', 'subscribers_count'
+    )
 
     USERNAME_FIELD = 'email'
     REQUIRED_FIELDS = ['first_name', 'last_name', 'username', 'password']
@@ -65,6 +99,12 @@ class UserSubscription(models.Model):
         verbose_name = 'Подписка'
         verbose_name_plural = 'Подписки'
         ordering = ('id',)
+        indexes = [
+            models.Index(
+                fields=['author', 'user'],
+                name='subscription_author_user_idx'
+            ),
+        ]
         constraints = [
             models.UniqueConstraint(
                 fields=['user', 'author'],
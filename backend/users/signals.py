@@ -0,0 +1,25 @@
+from django.db.models import F
+from django.db.models.functions import Greatest
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .models import User, UserSubscription
+
+
+def update_counter(model, pk, field, delta):
+    model.objects.filter(pk=pk).update(
+        **{field: Greatest(F(field) + delta, 0)}
+    )
+
+
+@receiver(post_save, sender=UserSubscription)
+def increment_subscription_counters(instance, created, **kwargs):
+    if created:
+        update_counter(User, instance.user_id, 'subscriptions_count', 1)
+        update_counter(User, instance.author_id, 'subscribers_count', 1)
+
+
+@receiver(post_delete, sender=UserSubscription)
+def decrement_subscription_counters(instance, **kwargs):
+    update_counter(User, instance.user_id, 'subscriptions_count', -1)
+    update_counter(User, instance.author_id, 'subscribers_count', -1)